@@ -1,8 +1,45 @@
 import time
+import tracemalloc
 import psutil
 import os
+import sys
+from .Profiler import Profiler, NULL_PROFILER
+
+try:
+    import resource
+except ImportError:
+    # rusage sampling relies on POSIX getrusage
+    resource = None
+
+# How peak memory is measured: "nodes" reads the RSS every sample_every nodes,
+# "interval" every sample_every milliseconds, "tracemalloc" tracks the Python heap
+# peak, and "rusage" reads the process's peak RSS from getrusage when the search stops
+MEMORY_SAMPLING = ("nodes", "interval", "tracemalloc", "rusage")
 
 class AlgorithmMetrics:
+    # Process-wide sampling settings, read when tracking starts
+    memory_sampling = "nodes"
+    sample_every = 256
+    # Sample spacing when none is given: nodes, or milliseconds for interval
+    default_every = {"nodes": 256, "interval": 10}
+    # Nodes between clock reads in interval mode
+    clock_stride = 64
+    # Nodes between profiler samples; 0 turns profiling off
+    profile_every = 0
+
+    @classmethod
+    def configure_sampling(cls, mode, every=None):
+        if mode not in MEMORY_SAMPLING:
+            raise ValueError(f"Unknown memory sampling: {mode}")
+        if mode == "rusage" and resource is None:
+            raise ValueError("rusage memory sampling needs the resource module")
+        cls.memory_sampling = mode
+        cls.sample_every = every if every is not None else cls.default_every.get(mode, 0)
+
+    @classmethod
+    def configure_profiling(cls, every):
+        cls.profile_every = every
+
     def __init__(self):
         self.start_time = None
         self.end_time = None
@@ -12,31 +49,114 @@ class AlgorithmMetrics:
         self.total_steps = 0
         self.total_weight = 0
         self.solution_path = ""
+        # Children rejected by each pruning rule
+        self.pruned_children = {}
+        # Anytime searches: (time ms, weight, w, bound) of every better solution,
+        # and the final cost bound relative to optimal
+        self.improvements = []
+        self.suboptimality_bound = None
+        # Per-phase timings, saved next to the output file when enabled
+        self.profiler = Profiler(self.profile_every) if self.profile_every else NULL_PROFILER
+        self.process = psutil.Process(os.getpid())
+        self.memory_sampling = AlgorithmMetrics.memory_sampling
+        self.sample_every = AlgorithmMetrics.sample_every
+        # Nodes left until update_peak_memory takes the next sample
+        self.countdown = 0
+        self.next_sample_ns = 0
+
+    # The psutil handle is bound to this process, so it is rebuilt after pickling
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['process']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
         self.process = psutil.Process(os.getpid())
 
     def start_tracking(self):
-        self.start_time = time.time()
-        self.start_memory = self.process.memory_info().rss
+        self.memory_sampling = AlgorithmMetrics.memory_sampling
+        self.sample_every = AlgorithmMetrics.sample_every
+        if self.memory_sampling == "tracemalloc":
+            # Tracing stays on for the rest of the process once started
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.start_memory = tracemalloc.get_traced_memory()[0]
+        else:
+            self.start_memory = self.process.memory_info().rss
         self.peak_memory = self.start_memory
+        self.countdown = self.sample_every if self.memory_sampling == "nodes" else self.clock_stride
+        self.start_time = time.perf_counter_ns()
+        self.next_sample_ns = self.start_time + self.sample_every * 1000000
 
     def stop_tracking(self):
-        self.end_time = time.time()
-        self.update_peak_memory()
+        self.end_time = time.perf_counter_ns()
+        self.sample_memory()
 
+    # Called for every expanded node; only every few calls actually read memory
     def update_peak_memory(self):
-        current_memory = self.process.memory_info().rss
+        self.countdown -= 1
+        if self.countdown > 0:
+            return
+
+        if self.memory_sampling == "nodes":
+            self.countdown = self.sample_every
+            self.sample_memory()
+        elif self.memory_sampling == "interval":
+            self.countdown = self.clock_stride
+            now = time.perf_counter_ns()
+            if now >= self.next_sample_ns:
+                self.next_sample_ns = now + self.sample_every * 1000000
+                self.sample_memory()
+        else:
+            # tracemalloc and getrusage keep their own peak
+            self.countdown = sys.maxsize
+
+    def sample_memory(self):
+        if self.memory_sampling == "tracemalloc":
+            current_memory = tracemalloc.get_traced_memory()[1]
+        elif self.memory_sampling == "rusage":
+            # Peak over the whole process, so an earlier, bigger search hides this one.
+            # ru_maxrss is in KB on Linux and in bytes on macOS
+            scale = 1 if sys.platform == "darwin" else 1024
+            current_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        else:
+            current_memory = self.process.memory_info().rss
         if current_memory > self.peak_memory:
             self.peak_memory = current_memory
 
+    def record_prune(self, rule, count=1):
+        self.pruned_children[rule] = self.pruned_children.get(rule, 0) + count
+
+    def record_improvement(self, total_weight, w, bound):
+        self.improvements.append((self.get_execution_time_ms(), total_weight, w, bound))
+        self.suboptimality_bound = bound
+
     def get_execution_time_ms(self):
-        if self.start_time and self.end_time:
-            return (self.end_time - self.start_time) * 1000
+        if self.start_time is not None and self.end_time is not None:
+            return (self.end_time - self.start_time) / 1000000
         return 0
 
     def get_memory_usage_mb(self):
         # Convert to MB
         return (self.peak_memory - self.start_memory) / 1024 / 1024
 
+    # Fields of a structured results record (see ResultsWriter)
+    def to_record(self):
+        return {
+            "steps": self.total_steps,
+            "weight": self.total_weight,
+            "nodes": self.nodes_explored,
+            "time_ms": round(self.get_execution_time_ms(), 3),
+            "memory_mb": round(self.get_memory_usage_mb(), 3),
+            "path": self.solution_path,
+            "bound": self.suboptimality_bound,
+            "pruned": self.pruned_children,
+            "improvements": [{"time_ms": round(time_ms, 3), "weight": total_weight, "w": w, "bound": bound}
+                             for time_ms, total_weight, w, bound in self.improvements]
+        }
+
     def save_to_file(self, algorithm_name, level_number):
         output_filename = f"output-{int(level_number):02d}.txt"
 
@@ -49,3 +169,10 @@ class AlgorithmMetrics:
             f.write(f"Time (ms): {self.get_execution_time_ms():.2f}, ")
             f.write(f"Memory (MB): {self.get_memory_usage_mb():.2f}\n")
             f.write(f"{self.solution_path}")
+            # Only written by weighted and anytime searches
+            if self.suboptimality_bound is not None:
+                f.write(f"\nBound: {self.suboptimality_bound:.3f}")
+            for time_ms, total_weight, w, bound in self.improvements:
+                f.write(f"\nImprovement: Time (ms): {time_ms:.2f}, Weight: {total_weight}, w: {w:g}, Bound: {bound:.3f}")
+
+        self.profiler.save_to_file(algorithm_name, level_number)
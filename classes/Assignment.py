@@ -0,0 +1,111 @@
+INF = float('inf')
+
+# Minimum cost assignment over a square cost matrix (pad with zero rows when there
+# are fewer stones than switches) that keeps its dual potentials, so a single
+# changed row can be repaired with one augmenting path instead of a full solve
+class Assignment:
+    def __init__(self, row_potentials, col_potentials, col_rows, total=0):
+        # Rows and columns are 1-based; column 0 and row 0 are the algorithm's sentinels
+        self.u = row_potentials
+        self.v = col_potentials
+        self.p = col_rows
+        self.total = total
+
+    @staticmethod
+    def solve(cost):
+        size = len(cost)
+        assignment = Assignment([0] * (size + 1), [0] * (size + 1), [0] * (size + 1))
+        for row in range(1, size + 1):
+            assignment.augment(cost, row)
+        assignment.total = assignment.cost_of(cost)
+        return assignment
+
+    # Return a new assignment for cost, where only row (0-based) differs from the
+    # matrix this one was solved for
+    def repaired(self, cost, row):
+        repaired = Assignment(self.u[:], self.v[:], self.p[:])
+        row += 1
+        v = repaired.v
+        size = len(cost)
+
+        # Free the changed row's column, then make its potential feasible again
+        repaired.p[repaired.p.index(row, 1)] = 0
+        row_cost = cost[row - 1]
+        repaired.u[row] = min(row_cost[j - 1] - v[j] for j in range(1, size + 1))
+
+        repaired.augment(cost, row)
+        repaired.total = repaired.cost_of(cost)
+        return repaired
+
+    # Return a copy with row old_row moved to new_row (0-based) and the rows in
+    # between shifted by one, for when equal-cost rows are reordered
+    def with_row_moved(self, old_row, new_row):
+        if old_row == new_row:
+            return self
+
+        old_row += 1
+        new_row += 1
+        shift = 1 if old_row > new_row else -1
+        low, high = min(old_row, new_row), max(old_row, new_row)
+
+        def moved(row):
+            if row == old_row:
+                return new_row
+            if low <= row <= high:
+                return row + shift
+            return row
+
+        u = self.u[:]
+        for row in range(low, high + 1):
+            u[moved(row)] = self.u[row]
+        p = [moved(row) if row else 0 for row in self.p]
+        return Assignment(u, self.v[:], p, self.total)
+
+    # One phase of the Hungarian algorithm: match row along a shortest augmenting path
+    def augment(self, cost, row):
+        u, v, p = self.u, self.v, self.p
+        size = len(cost)
+        minv = [INF] * (size + 1)
+        used = [False] * (size + 1)
+        way = [0] * (size + 1)
+
+        p[0] = row
+        j0 = 0
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row_cost = cost[i0 - 1]
+            u_i0 = u[i0]
+            delta = INF
+            j1 = 0
+            for j in range(1, size + 1):
+                if not used[j]:
+                    cur = row_cost[j - 1] - u_i0 - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+
+            for j in range(size + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+        p[0] = 0
+
+    def cost_of(self, cost):
+        p = self.p
+        return sum(cost[p[j] - 1][j - 1] for j in range(1, len(p)) if p[j])
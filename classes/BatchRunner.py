@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .GameState import GameState
+from .SolverRunner import SolverRunner
+
+try:
+    import resource
+except ImportError:
+    # Memory caps rely on POSIX rlimits
+    resource = None
+
+# Runs in a worker process: solve one (level, algorithm) pair under the job's limits
+# and return (status, metrics); status is "solved", "unsolved", "timeout" or "memory",
+# and BatchRunner.run reports "error" for jobs whose worker crashed
+def solve_job(filename, algorithm, options, operation_limit, time_limit, memory_limit_mb):
+    state = GameState.from_file(filename)
+    solver = SolverRunner.create_solver(algorithm, state, **options)
+
+    if memory_limit_mb is not None and resource is not None:
+        # Cap the address space on top of what the interpreter and imports already use
+        limit = solver.metrics.process.memory_info().vms + memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    try:
+        status = SolverRunner.solve(solver, operation_limit, time_limit)
+    except MemoryError:
+        return "memory", None
+
+    return status, solver.metrics
+
+# Fans (level x algorithm) jobs out over a process pool and writes the results back
+# in a fixed order once every job is done
+class BatchRunner:
+    def __init__(self, jobs=None, operation_limit=None, time_limit=None, memory_limit_mb=None, options=None):
+        self.jobs = jobs
+        self.operation_limit = operation_limit
+        self.time_limit = time_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.options = options or {}
+
+    # Return {(filename, algorithm): (status, metrics)} for every pair
+    def run(self, files, algorithms):
+        # One process per job, so rlimits and memory never leak between jobs
+        with ProcessPoolExecutor(max_workers=self.jobs, max_tasks_per_child=1) as executor:
+            futures = {
+                (filename, algorithm): executor.submit(solve_job, filename, algorithm, self.options,
+                                                       self.operation_limit, self.time_limit,
+                                                       self.memory_limit_mb)
+                for filename in files for algorithm in algorithms
+            }
+            results = {}
+            for job, future in futures.items():
+                try:
+                    results[job] = future.result()
+                except Exception:
+                    # A job that raised or whose worker died (BrokenProcessPool) is recorded
+                    # as an error, keeping the results of every other job
+                    results[job] = ("error", None)
+            return results
+
+    # Append the solved jobs to output-XX.txt in the given level and algorithm order
+    @staticmethod
+    def write_outputs(results, files, algorithms, level_numbers, fresh=False):
+        for filename in files:
+            number = level_numbers[filename]
+            output_filename = f"output-{number:02d}.txt"
+            if fresh and os.path.exists(output_filename):
+                os.remove(output_filename)
+
+            for algorithm in algorithms:
+                status, metrics = results[(filename, algorithm)]
+                if status == "solved":
+                    metrics.save_to_file(SolverRunner.algorithms[algorithm].algorithm_name, number)
@@ -0,0 +1,42 @@
+from collections import deque
+from heapq import heappop, heappush
+
+# Priority queue for small integer priorities: entries are kept in one bucket per
+# priority (entry[0]). Pushing to or popping from an existing bucket is O(1); only
+# opening or emptying a bucket touches the heap of distinct priorities, which costs
+# O(log P) for P distinct priorities in the queue
+class BucketQueue:
+    def __init__(self, tie_policy="fifo"):
+        if tie_policy not in ("fifo", "lifo"):
+            raise ValueError(f"Unknown tie policy: {tie_policy}")
+        self.lifo = tie_policy == "lifo"
+        self.buckets = {}
+        self.priorities = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    # Every queued entry, in no particular order
+    def __iter__(self):
+        for bucket in self.buckets.values():
+            yield from bucket
+
+    def push(self, entry):
+        priority = entry[0]
+        bucket = self.buckets.get(priority)
+        if bucket is None:
+            bucket = self.buckets[priority] = deque()
+            heappush(self.priorities, priority)
+        bucket.append(entry)
+        self.size += 1
+
+    def pop(self):
+        priority = self.priorities[0]
+        bucket = self.buckets[priority]
+        entry = bucket.pop() if self.lifo else bucket.popleft()
+        if not bucket:
+            del self.buckets[priority]
+            heappop(self.priorities)
+        self.size -= 1
+        return entry
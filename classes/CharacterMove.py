@@ -33,3 +33,158 @@ class CharacterMove:
         updates['player_pos'] = (new_x, new_y)
 
         return state.create_new_state(updates, stone_move)
+
+    # Generate (direction, player, stones, pushed_slot) children of a compact state
+    # without building GameState objects; pushed_slot is -1 for a plain walk
+    @staticmethod
+    def successors(level, player, stones):
+        occupied = {cell: slot for slot, cell in enumerate(stones)}
+        is_wall = level.is_wall
+
+        for direction, step in enumerate(level.neighbors):
+            new_player = step[player]
+            if new_player < 0 or is_wall[new_player]:
+                continue
+
+            slot = occupied.get(new_player, -1)
+            if slot < 0:
+                yield direction, new_player, stones, -1
+                continue
+
+            # Check the cell behind the stone
+            target = step[new_player]
+            if target < 0 or is_wall[target] or target in occupied:
+                continue
+
+            yield direction, new_player, level.move_stone(stones, slot, target), slot
+
+    # Flood fill the cells the player can walk to, mapped to their walking distance
+    @staticmethod
+    def reachable(level, player, occupied):
+        is_wall = level.is_wall
+        neighbors = level.neighbors
+        distances = {player: 0}
+        layer = [player]
+        distance = 0
+
+        while layer:
+            distance += 1
+            next_layer = []
+            for cell in layer:
+                for step in neighbors:
+                    new_cell = step[cell]
+                    if new_cell < 0 or is_wall[new_cell] or new_cell in occupied or new_cell in distances:
+                        continue
+                    distances[new_cell] = distance
+                    next_layer.append(new_cell)
+            layer = next_layer
+
+        return distances
+
+    # Bitmask of the cells of a reachable() region, so push-mode searches can close
+    # a whole player region at once and test any cell of it without a flood fill
+    @staticmethod
+    def region_mask(reach):
+        mask = 0
+        for cell in reach:
+            mask |= 1 << cell
+        return mask
+
+    # Generate (direction, from_cell, stones, pushed_slot) for every stone push the
+    # player can reach; after the push the player stands on the stone's old cell
+    @staticmethod
+    def pushes(level, stones, occupied, reach):
+        is_wall = level.is_wall
+        neighbors = level.neighbors
+
+        for slot, cell in enumerate(stones):
+            for direction, step in enumerate(neighbors):
+                from_cell = neighbors[level.opposite[direction]][cell]
+                if from_cell not in reach:
+                    continue
+
+                target = step[cell]
+                if target < 0 or is_wall[target] or target in occupied:
+                    continue
+
+                yield direction, from_cell, level.move_stone(stones, slot, target), slot
+
+    # Reverse of pushes: generate (direction, from_cell, stones, pulled_slot) for every
+    # stone the player can pull back by one cell, where (from_cell, direction) is the
+    # push that undoes the pull; after the pull the player stands on from_cell
+    @staticmethod
+    def pulls(level, stones, occupied, reach):
+        is_wall = level.is_wall
+        neighbors = level.neighbors
+
+        for slot, cell in enumerate(stones):
+            for direction in range(4):
+                back = neighbors[level.opposite[direction]]
+                target = back[cell]
+                if target not in reach:
+                    continue
+
+                from_cell = back[target]
+                if from_cell < 0 or is_wall[from_cell] or from_cell in occupied:
+                    continue
+
+                yield direction, from_cell, level.move_stone(stones, slot, target), slot
+
+    # Shortest walk between two cells as a list of directions
+    @staticmethod
+    def walk_path(level, start, goal, occupied):
+        is_wall = level.is_wall
+        parents = {start: None}
+        layer = [start]
+
+        while layer and goal not in parents:
+            next_layer = []
+            for cell in layer:
+                for direction, step in enumerate(level.neighbors):
+                    new_cell = step[cell]
+                    if new_cell < 0 or is_wall[new_cell] or new_cell in occupied or new_cell in parents:
+                        continue
+                    parents[new_cell] = (cell, direction)
+                    next_layer.append(new_cell)
+            layer = next_layer
+
+        directions = []
+        cell = goal
+        while parents[cell] is not None:
+            cell, direction = parents[cell]
+            directions.append(direction)
+        directions.reverse()
+        return directions
+
+    # Turn a sequence of (from_cell, direction) pushes into the full move string,
+    # filling in the walks between pushes; returns (path, total_weight)
+    @staticmethod
+    def expand_pushes(level, pushes):
+        player, stones = level.initial_player, level.initial_stones
+        moves = []
+        total_weight = 0
+
+        for from_cell, direction in pushes:
+            for step in CharacterMove.walk_path(level, player, from_cell, set(stones)):
+                moves.append(level.direction_chars[step].lower())
+                total_weight += 1
+
+            cell = level.neighbors[direction][from_cell]
+            slot = stones.index(cell)
+            stones = level.move_stone(stones, slot, level.neighbors[direction][cell])
+            player = cell
+            moves.append(level.direction_chars[direction])
+            total_weight += 1 + level.weights[slot]
+
+        return "".join(moves), total_weight
+
+    # Return the name of the first pruner that rejects the stone pushed onto
+    # moved_cell, or None when the child should be kept
+    @staticmethod
+    def is_pruned(pruners, level, stones, moved_cell, metrics=None):
+        for pruner in pruners:
+            if pruner.is_deadlocked(level, stones, moved_cell):
+                if metrics is not None:
+                    metrics.record_prune(pruner.name)
+                return pruner.name
+        return None
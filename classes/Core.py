@@ -3,10 +3,8 @@ import asyncio
 import tkinter as tk
 from tkinter import ttk
 from .GameState import GameState
-from .algorithms.BFS import BFSSolver
-from .algorithms.DFS import DFSSolver
-from .algorithms.UCS import UCSSolver
-from .algorithms.A_Star import AStarSolver
+from .SolverRunner import SolverRunner
+from .SolveWorker import SolveWorker
 
 class Core:
     def __init__(self, gui):
@@ -19,6 +17,7 @@ class Core:
         self.total_weight = 0
         self.play_speed = 200
         self.current_task = None
+        self.worker = None
 
         self.setup_bindings()
         self.load_level("1")
@@ -26,7 +25,7 @@ class Core:
     def setup_bindings(self):
         self.gui.selected_level.trace_add('write', lambda *args: self.on_level_change())
         self.gui.selected_algorithm.trace_add('write', lambda *args: self.on_algorithm_change())
-        self.gui.solve_button.config(command=self.start_solve)
+        self.gui.solve_button.config(command=self.toggle_solve)
         self.gui.play_button.config(command=self.toggle_play)
         self.gui.next_button.config(command=self.next_step)
         self.gui.reset_button.config(command=lambda: self.reset_full_state())
@@ -37,27 +36,8 @@ class Core:
 
         try:
             if os.path.exists(filename):
-                with open(filename, 'r') as file:
-                    weights = list(map(int, file.readline().rstrip('\n').split()))
-                    map_temp = []
-                    for line in file:
-                        map_temp.append(list(line.rstrip('\n')))
-
-                    n = len(map_temp[0])
-                    m = len(map_temp)
-                    weight_data = [[0 for _ in range(m)] for _ in range(n)]
-                    map_data = [[' ' for _ in range(m)] for _ in range(n)]
-                    weight_id = 0
-
-                    for j in range(m):
-                        for i in range(n):
-                            map_data[i][j] = map_temp[j][i]
-                            if map_temp[j][i] in ['$', '*']:
-                                weight_data[i][j] = weights[weight_id]
-                                weight_id += 1
-
-                    self.current_state = GameState(map_data, weight_data)
-                    self.gui.draw_state(self.current_state)
+                self.current_state = GameState.from_file(filename)
+                self.gui.draw_state(self.current_state)
             else:
                 print(f"File {filename} not found")
         except Exception as e:
@@ -66,19 +46,15 @@ class Core:
         self.reset_solve_state()
 
     def on_level_change(self):
-        if self.current_task:
-            # Cancel any running solve task
-            self.current_task.cancel()
-            self.current_task = None
+        # Cancel any running solve task
+        self.cancel_solve()
         level = self.gui.selected_level.get()
         self.reset_full_state()
         self.load_level(level)
 
     def on_algorithm_change(self):
-        if self.current_task:
-            # Cancel any running solve task
-            self.current_task.cancel()
-            self.current_task = None
+        # Cancel any running solve task
+        self.cancel_solve()
         self.stop_playback()
         self.reset_full_state()
         level = self.gui.selected_level.get()
@@ -104,28 +80,21 @@ class Core:
             if not self.current_state:
                 return
 
+            algorithm = self.gui.selected_algorithm.get()
+            worker = self.worker = SolveWorker(self.current_state, algorithm)
+            worker.start()
+
             try:
-                if self.gui.selected_algorithm.get() == "bfs":
-                    self.solver = BFSSolver(self.current_state)
-                    data_structure = self.solver.queue
-                elif self.gui.selected_algorithm.get() == "dfs":
-                    self.solver = DFSSolver(self.current_state)
-                    data_structure = self.solver.stack
-                elif self.gui.selected_algorithm.get() == "ucs":
-                    self.solver = UCSSolver(self.current_state)
-                    data_structure = self.solver.priority_queue
-                else:
-                    self.solver = AStarSolver(self.current_state)
-                    data_structure = self.solver.priority_queue
-
-                operations = 0
-                chunk_size = 1000
-
-                while operations < self.solver.operation_limit:
-                    for _ in range(chunk_size):
-                        operations += 1
-                        if self.solver.process_one_state():
+                while True:
+                    for kind, payload in worker.poll():
+                        if kind == "progress":
+                            self.show_progress(payload)
+                        elif kind == "solved":
+                            # Replay the worker's path with a local solver for this level
+                            self.solver = SolverRunner.create_solver(algorithm, self.current_state)
+                            SolverRunner.restore_solution(self.solver, payload)
                             self.is_solved = True
+                            self.gui.weight_var.set("Total Weight: 0       Step: 0")
                             # Show play and next buttons, hide solve button
                             self.gui.solve_button.pack_forget()
                             self.gui.play_button.pack(side=tk.LEFT, padx=5)
@@ -135,16 +104,18 @@ class Core:
                             level_number = self.gui.selected_level.get()
                             self.solver.save_metrics(level_number)
                             return True
+                        else:
+                            self.show_error_popup("Cannot solve the puzzle after 1,000,000 operations.")
+                            self.gui.solve_button.pack_forget()
+                            return False
 
-                        if not data_structure:
-                            break
-
-                    # Yield control to prevent freezing
-                    await asyncio.sleep(0)
+                    if not worker.is_alive() and worker.messages.empty():
+                        self.show_error_popup("The solver stopped unexpectedly.")
+                        self.gui.solve_button.pack_forget()
+                        return False
 
-                self.show_error_popup("Cannot solve the puzzle after 1,000,000 operations.")
-                self.gui.solve_button.pack_forget()
-                return False
+                    # Check for progress again without blocking the GUI
+                    await asyncio.sleep(0.05)
 
             # Clean up when task is cancelled
             except asyncio.CancelledError:
@@ -154,6 +125,9 @@ class Core:
                 # Re-raise to properly handle cancellation
                 raise
 
+            finally:
+                self.stop_worker(worker)
+
         except asyncio.CancelledError:
             # Catch cancellation but don't try to modify GUI elements
             self.solver = None
@@ -163,17 +137,42 @@ class Core:
             # Catch Tcl errors when window is destroyed
             pass
 
-    def start_solve(self):
+    def show_progress(self, progress):
+        text = f"Nodes: {progress['nodes']}       Frontier: {progress['frontier']}"
+        if progress["best_f"] is not None:
+            text += f"       Best f: {progress['best_f']}"
+        self.gui.weight_var.set(text)
+
+    # Kill worker, or the current one; a cancelled task may finish after a new
+    # solve has started, so it only stops its own worker
+    def stop_worker(self, worker=None):
+        worker = worker or self.worker
+        if worker:
+            worker.cancel()
+            if worker is self.worker:
+                self.worker = None
+
+    # Cancel the running solve task and kill its worker right away
+    def cancel_solve(self):
         if self.current_task:
             self.current_task.cancel()
+            self.current_task = None
+        self.stop_worker()
+
+    def toggle_solve(self):
+        if self.current_task and not self.current_task.done():
+            self.cancel_solve()
+            self.reset_solve_state()
+        else:
+            self.start_solve()
+
+    def start_solve(self):
+        self.cancel_solve()
         self.current_task = asyncio.create_task(self.solve_puzzle())
-        self.gui.solve_button.config(text="Solving...")
-        self.gui.solve_button.config(state='disabled')
+        self.gui.solve_button.config(text="Cancel")
 
     def reset_solve_state(self):
-        if self.current_task:
-            self.current_task.cancel()
-            self.current_task = None
+        self.cancel_solve()
 
         self.is_playing = False
         self.is_solved = False
@@ -130,7 +130,8 @@ class DrawGUI:
             ("Breadth-First Search", "bfs"),
             ("Depth-First Search", "dfs"),
             ("Uniform Cost Search", "ucs"),
-            ("A* Search with heuristic", "a_star")
+            ("A* Search with heuristic", "a_star"),
+            ("IDA* Search (bounded memory)", "ida_star")
         ]
 
         for text, value in algorithms:
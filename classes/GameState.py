@@ -13,6 +13,34 @@ class GameState:
             self.player_pos = None
             self.player_on_switch = False
 
+    # Load an input-XX.txt file: stone weights on the first line, then the map rows
+    @staticmethod
+    def from_file(filename):
+        with open(filename, 'r') as file:
+            weights = list(map(int, file.readline().rstrip('\n').split()))
+            rows = [line.rstrip('\n') for line in file]
+        return GameState.from_rows(weights, rows)
+
+    # Build a state from map rows of equal length and the stone weights in reading order
+    @staticmethod
+    def from_rows(weights, rows):
+        map_temp = [list(row) for row in rows]
+
+        n = len(map_temp[0])
+        m = len(map_temp)
+        weight_data = [[0 for _ in range(m)] for _ in range(n)]
+        map_data = [[' ' for _ in range(m)] for _ in range(n)]
+        weight_id = 0
+
+        for j in range(m):
+            for i in range(n):
+                map_data[i][j] = map_temp[j][i]
+                if map_temp[j][i] in ['$', '*']:
+                    weight_data[i][j] = weights[weight_id]
+                    weight_id += 1
+
+        return GameState(map_data, weight_data)
+
     # Equality check for states
     def __eq__(self, other):
         if not isinstance(other, GameState):
@@ -85,8 +113,9 @@ class GameState:
         new_state = GameState()
         new_state.width = self.width
         new_state.height = self.height
-        new_state.walls = self.walls.copy()
-        new_state.switches = self.switches.copy()
+        # Walls and switches never change, so children share them
+        new_state.walls = self.walls
+        new_state.switches = self.switches
         new_state.stones = self.stones.copy()
         new_state.player_pos = self.player_pos
         new_state.player_on_switch = self.player_on_switch
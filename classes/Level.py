@@ -0,0 +1,178 @@
+import random
+import numpy
+from .StateEncoder import StateEncoder
+from .Assignment import Assignment
+
+class Level:
+    # Same order as the solvers' direction list: down, right, up, left
+    directions = ((0, 1), (1, 0), (0, -1), (-1, 0))
+    direction_chars = ('D', 'R', 'U', 'L')
+    opposite = (2, 3, 0, 1)
+    # Push distance used for cells a stone can never push to a switch
+    unreachable = 10**6
+    # Fixed seed, so every process builds the same Zobrist tables for a level
+    zobrist_seed = 0x5EED
+
+    def __init__(self, initial_state, key_layout="slots"):
+        self.width = initial_state.width
+        self.height = initial_state.height
+        self.num_cells = self.width * self.height
+        self.walls = frozenset(initial_state.walls)
+        self.switches = frozenset(initial_state.switches)
+        self.encoder = StateEncoder(initial_state, key_layout)
+        self.weights = self.encoder.weights
+
+        self.is_wall = bytes(self.encoder.cell_pos(cell) in self.walls for cell in range(self.num_cells))
+        self.is_switch = bytes(self.encoder.cell_pos(cell) in self.switches for cell in range(self.num_cells))
+        self.switch_cells = tuple(sorted(self.encoder.cell_index(pos) for pos in self.switches))
+
+        # Neighbour of every cell in each direction, -1 when the step leaves the map
+        neighbors = []
+        for dx, dy in self.directions:
+            step = []
+            for cell in range(self.num_cells):
+                x, y = self.encoder.cell_pos(cell)
+                nx, ny = x + dx, y + dy
+                step.append(ny * self.width + nx if 0 <= nx < self.width and 0 <= ny < self.height else -1)
+            neighbors.append(tuple(step))
+        self.neighbors = tuple(neighbors)
+
+        # Weight class (start, end) of every slot, from the encoder's classes
+        self.slot_class = tuple(weight_class for weight_class in self.encoder.classes
+                                for _ in range(*weight_class))
+
+        # Zobrist tables: a random 64-bit word per player cell and per stone cell of
+        # each weight class; stones of equal weight share a table, like their slots
+        rng = random.Random(self.zobrist_seed)
+        self.zobrist_player = tuple(rng.getrandbits(64) for _ in range(self.num_cells))
+        class_tables = {weight_class: tuple(rng.getrandbits(64) for _ in range(self.num_cells))
+                        for weight_class in self.encoder.classes}
+        self.zobrist_stones = tuple(class_tables[weight_class] for weight_class in self.slot_class)
+
+        self.is_dead = self.find_dead_squares()
+        self.push_distances = self.find_push_distances()
+        self.row_costs, self.padding_rows = self.find_row_costs()
+
+        player_cell, stone_cells = self.encoder.unpack(self.encoder.encode(initial_state))
+        self.initial_player = player_cell
+        self.initial_stones = stone_cells
+
+    # A floor cell is dead when no sequence of pushes can bring a stone on it to any
+    # switch; found by pulling stones backwards from every switch at once
+    def find_dead_squares(self):
+        is_wall = self.is_wall
+        live = bytearray(self.num_cells)
+        stack = list(self.switch_cells)
+        for cell in stack:
+            live[cell] = 1
+
+        while stack:
+            cell = stack.pop()
+            for step in self.neighbors:
+                # The player stands on prev_cell and walks away, pulling the stone onto it
+                prev_cell = step[cell]
+                if prev_cell < 0 or is_wall[prev_cell] or live[prev_cell]:
+                    continue
+                player_cell = step[prev_cell]
+                if player_cell < 0 or is_wall[player_cell]:
+                    continue
+                live[prev_cell] = 1
+                stack.append(prev_cell)
+
+        return bytes(not is_wall[cell] and not live[cell] for cell in range(self.num_cells))
+
+    # Minimum number of pushes from every cell to each switch, as a
+    # [num_switches x num_cells] array, found by pulling back from the switch
+    def find_push_distances(self):
+        is_wall = self.is_wall
+        table = []
+
+        for switch in self.switch_cells:
+            distances = [self.unreachable] * self.num_cells
+            distances[switch] = 0
+            layer = [switch]
+            while layer:
+                next_layer = []
+                for cell in layer:
+                    for step in self.neighbors:
+                        prev_cell = step[cell]
+                        if prev_cell < 0 or is_wall[prev_cell] or distances[prev_cell] != self.unreachable:
+                            continue
+                        player_cell = step[prev_cell]
+                        if player_cell < 0 or is_wall[player_cell]:
+                            continue
+                        distances[prev_cell] = distances[cell] + 1
+                        next_layer.append(prev_cell)
+                layer = next_layer
+            table.append(distances)
+
+        return numpy.array(table, dtype=numpy.int64).reshape(len(self.switch_cells), self.num_cells)
+
+    # Cost of pushing each slot's stone from every cell to every switch, as
+    # row_costs[slot][cell] rows for the incremental assignment: push distance times
+    # the (1 + weight) cost of a single push. Rows are padded up to a square matrix:
+    # zero rows when there are more switches than stones, and unreachable switch
+    # columns when there are more stones than switches, which leaves such a level
+    # with an unreachable heuristic instead of no matrix
+    def find_row_costs(self):
+        num_switches = len(self.switch_cells)
+        num_stones = len(self.weights)
+        padding = [self.unreachable] * (num_stones - num_switches)
+        cell_distances = self.push_distances.T.tolist()
+
+        # Slots of equal weight share their rows
+        weight_rows = {}
+        for weight in set(self.weights):
+            weight_rows[weight] = tuple([distance * (weight + 1) for distance in distances] + padding
+                                        for distances in cell_distances)
+        row_costs = tuple(weight_rows[weight] for weight in self.weights)
+        padding_rows = [[0] * num_switches for _ in range(num_switches - num_stones)]
+        return row_costs, padding_rows
+
+    def cost_rows(self, stone_cells):
+        row_costs = self.row_costs
+        return [row_costs[slot][cell] for slot, cell in enumerate(stone_cells)] + self.padding_rows
+
+    # Minimum cost assignment of the stones to the switches, the A* heuristic
+    def assignment(self, stone_cells):
+        return Assignment.solve(self.cost_rows(stone_cells))
+
+    # Update the parent's assignment after the stone in slot pushed moved to
+    # target; the stone may land in another slot of its weight class
+    def repair_assignment(self, assignment, new_stones, pushed, target):
+        new_slot = new_stones.index(target, *self.slot_class[pushed])
+        assignment = assignment.with_row_moved(pushed, new_slot)
+        return assignment.repaired(self.cost_rows(new_stones), new_slot)
+
+    def zobrist(self, player, stones):
+        value = self.zobrist_player[player]
+        for slot, cell in enumerate(stones):
+            value ^= self.zobrist_stones[slot][cell]
+        return value
+
+    # Update a Zobrist hash in O(1): the player moves to new_player and, for a push,
+    # the stone in slot moves from new_player onto target
+    def zobrist_move(self, zobrist, player, new_player, slot=-1, target=-1):
+        zobrist ^= self.zobrist_player[player] ^ self.zobrist_player[new_player]
+        if slot >= 0:
+            stone_keys = self.zobrist_stones[slot]
+            zobrist ^= stone_keys[new_player] ^ stone_keys[target]
+        return zobrist
+
+    def is_solved(self, stones):
+        is_switch = self.is_switch
+        return all(is_switch[cell] for cell in stones)
+
+    # Return the stone tuple with one slot moved, keeping equal-weight slots sorted
+    def move_stone(self, stones, slot, target):
+        cells = list(stones)
+        start, end = self.slot_class[slot]
+        i = slot
+        while i > start and cells[i - 1] > target:
+            cells[i] = cells[i - 1]
+            i -= 1
+        while i < end - 1 and cells[i + 1] < target:
+            cells[i] = cells[i + 1]
+            i += 1
+        cells[i] = target
+        return tuple(cells)
@@ -0,0 +1,116 @@
+import random
+from .GameState import GameState
+from .Level import Level
+from .CharacterMove import CharacterMove
+
+# Seeded random levels that are solvable by construction: stones start on the
+# switches and are pulled away from them, and every pull is undone by a push
+class LevelGenerator:
+    # Attempts at a map before giving up on the parameters
+    max_attempts = 100
+
+    def __init__(self, width, height, stones, weight_range=(1, 99), wall_density=0.15, pulls=None, seed=None):
+        if width < 3 or height < 3:
+            raise ValueError("Levels need at least 3x3 cells, walls included")
+        if stones < 1:
+            raise ValueError("Levels need at least one stone")
+        self.width = width
+        self.height = height
+        self.stones = stones
+        self.weight_range = weight_range
+        self.wall_density = wall_density
+        # Random pulls applied to the solved arrangement; more pulls give longer solutions
+        self.pulls = 10 * stones if pulls is None else pulls
+        self.random = random.Random(seed)
+
+    # Return (weights, rows) in the input-XX.txt layout
+    def generate(self):
+        for _ in range(self.max_attempts):
+            floor = self.make_floor()
+            if len(floor) < 2 * self.stones + 1:
+                continue
+            level = self.scramble(floor)
+            if level is not None:
+                return level
+        raise ValueError(f"Could not generate a {self.width}x{self.height} level with {self.stones} stones")
+
+    # Floor cells of a map with walled borders and random inner walls, keeping only
+    # the largest connected area so every floor cell can be reached
+    def make_floor(self):
+        open_cells = {(x, y) for x in range(1, self.width - 1) for y in range(1, self.height - 1)
+                      if self.random.random() >= self.wall_density}
+
+        best = set()
+        unseen = set(open_cells)
+        while unseen:
+            start = unseen.pop()
+            area = {start}
+            stack = [start]
+            while stack:
+                x, y = stack.pop()
+                for dx, dy in Level.directions:
+                    cell = (x + dx, y + dy)
+                    if cell in unseen:
+                        unseen.discard(cell)
+                        area.add(cell)
+                        stack.append(cell)
+            if len(area) > len(best):
+                best = area
+        return best
+
+    def scramble(self, floor):
+        cells = sorted(floor)
+        switches = self.random.sample(cells, self.stones)
+        weights = {cell: self.random.randint(*self.weight_range) for cell in switches}
+        player = self.random.choice([cell for cell in cells if cell not in weights])
+
+        # Solved arrangement: every stone on a switch
+        goal = GameState.from_rows(*self.render(floor, switches, weights, player))
+        level = Level(goal)
+        character_move = CharacterMove()
+        player_cell, stones = level.initial_player, level.initial_stones
+
+        for _ in range(self.pulls):
+            occupied = set(stones)
+            reach = character_move.reachable(level, player_cell, occupied)
+            pulls = list(character_move.pulls(level, stones, occupied, reach))
+            if not pulls:
+                break
+            _, player_cell, stones, _ = self.random.choice(pulls)
+
+        if level.is_solved(stones):
+            return None
+
+        # The player may start anywhere it could walk to
+        occupied = set(stones)
+        player_cell = self.random.choice(sorted(character_move.reachable(level, player_cell, occupied)))
+        positions = [level.encoder.cell_pos(cell) for cell in stones]
+        stone_weights = dict(zip(positions, level.weights))
+        return self.render(floor, switches, stone_weights, level.encoder.cell_pos(player_cell))
+
+    # Map rows and the stone weights in reading order
+    def render(self, floor, switches, stone_weights, player):
+        switches = set(switches)
+        weights = []
+        rows = []
+        for y in range(self.height):
+            row = []
+            for x in range(self.width):
+                pos = (x, y)
+                if pos not in floor:
+                    row.append('#')
+                elif pos in stone_weights:
+                    row.append('*' if pos in switches else '$')
+                    weights.append(stone_weights[pos])
+                elif pos == player:
+                    row.append('+' if pos in switches else '@')
+                else:
+                    row.append('.' if pos in switches else ' ')
+            rows.append("".join(row))
+        return weights, rows
+
+    @staticmethod
+    def write(filename, weights, rows):
+        with open(filename, 'w') as f:
+            f.write(" ".join(map(str, weights)) + "\n")
+            f.write("\n".join(rows) + "\n")
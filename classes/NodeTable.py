@@ -0,0 +1,39 @@
+from array import array
+
+# Parent index and move of every generated node, kept in flat buffers so the
+# solution path is rebuilt once at the goal instead of copied into every child
+class NodeTable:
+    def __init__(self, with_cells=False):
+        self.parents = array('i', [-1])
+        self.moves = bytearray(1)
+        # Push mode also records the cell the player pushes from
+        self.cells = array('i', [-1]) if with_cells else None
+
+    def __len__(self):
+        return len(self.parents)
+
+    # Record a child of parent and return its index; the root is index 0
+    def add(self, parent, move, cell=-1):
+        self.parents.append(parent)
+        self.moves.append(move)
+        if self.cells is not None:
+            self.cells.append(cell)
+        return len(self.parents) - 1
+
+    # Move characters from the root to index
+    def path(self, index):
+        moves = bytearray()
+        while index > 0:
+            moves.append(self.moves[index])
+            index = self.parents[index]
+        moves.reverse()
+        return moves.decode()
+
+    # (from_cell, direction) pushes from the root to index
+    def pushes(self, index):
+        pushes = []
+        while index > 0:
+            pushes.append((self.cells[index], self.moves[index]))
+            index = self.parents[index]
+        pushes.reverse()
+        return pushes
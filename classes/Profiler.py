@@ -0,0 +1,87 @@
+import json
+import os
+import time
+
+# Per-phase timers for a solver's expansion loop. Each lap(phase) charges the time
+# since the previous lap to that phase, so one clock read covers one phase
+class Profiler:
+    enabled = True
+
+    def __init__(self, sample_every=1000):
+        # Nodes between frontier/visited samples
+        self.sample_every = sample_every
+        self.countdown = 0
+        # phase -> [total ns, calls]
+        self.phases = {}
+        # (nodes, time ms, frontier size, visited size) every sample_every nodes
+        self.series = []
+        self.nodes = 0
+        self.start_ns = time.perf_counter_ns()
+        self.last_ns = self.start_ns
+
+    # Start timing a new expansion, so time spent outside the solver is not charged
+    def start(self):
+        self.last_ns = time.perf_counter_ns()
+
+    def lap(self, phase):
+        now = time.perf_counter_ns()
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = [now - self.last_ns, 1]
+        else:
+            entry[0] += now - self.last_ns
+            entry[1] += 1
+        self.last_ns = now
+
+    # Called once per expanded node with the current frontier and visited sizes
+    def node(self, frontier, visited):
+        self.nodes += 1
+        self.countdown -= 1
+        if self.countdown > 0:
+            return
+        self.countdown = self.sample_every
+        now = time.perf_counter_ns()
+        self.series.append((self.nodes, (now - self.start_ns) / 1000000, frontier, visited))
+        # Sampling is not charged to the phase that follows
+        self.last_ns = time.perf_counter_ns()
+
+    def to_dict(self):
+        return {
+            "nodes": self.nodes,
+            "sample_every": self.sample_every,
+            "phases": {phase: {"calls": calls, "ms": total / 1000000}
+                       for phase, (total, calls) in self.phases.items()},
+            "series": [{"nodes": nodes, "time_ms": time_ms, "frontier": frontier, "visited": visited}
+                       for nodes, time_ms, frontier, visited in self.series]
+        }
+
+    # Store this run under algorithm_name in profile-XX.json, next to output-XX.txt
+    def save_to_file(self, algorithm_name, level_number):
+        profile_filename = f"profile-{int(level_number):02d}.json"
+        profiles = {}
+        if os.path.exists(profile_filename):
+            with open(profile_filename) as f:
+                profiles = json.load(f)
+        profiles[algorithm_name] = self.to_dict()
+        with open(profile_filename, 'w') as f:
+            json.dump(profiles, f, indent=2)
+
+
+# Stand-in used when profiling is off: every hook is an empty call
+class NullProfiler:
+    enabled = False
+
+    def start(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def node(self, frontier, visited):
+        pass
+
+    def save_to_file(self, algorithm_name, level_number):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
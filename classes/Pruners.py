@@ -0,0 +1,143 @@
+# Pruners reject a child right after a push; each one looks at the stone that moved
+class DeadSquarePruner:
+    name = "dead_square"
+
+    def is_deadlocked(self, level, stones, moved_cell):
+        return level.is_dead[moved_cell]
+
+
+# A 2x2 square filled with walls and stones can never be broken up
+class BlockDeadlockPruner:
+    name = "block_2x2"
+    # (horizontal, vertical) direction pairs spanning the four squares around a cell
+    corners = ((1, 0), (1, 2), (3, 0), (3, 2))
+
+    def is_deadlocked(self, level, stones, moved_cell):
+        occupied = set(stones)
+        is_wall = level.is_wall
+        neighbors = level.neighbors
+
+        for horizontal, vertical in self.corners:
+            side = neighbors[horizontal][moved_cell]
+            below = neighbors[vertical][moved_cell]
+            diagonal = neighbors[vertical][side] if side >= 0 else -1
+
+            square = (moved_cell, side, below, diagonal)
+            if all(cell < 0 or is_wall[cell] or cell in occupied for cell in square):
+                # Only a square holding a stone off its switch is a deadlock
+                if any(cell >= 0 and cell in occupied and not level.is_switch[cell] for cell in square):
+                    return True
+        return False
+
+
+# A stone is frozen when it is blocked on both axes by walls, pairs of dead squares
+# or other frozen stones; a frozen group with a stone off its switch is a deadlock
+class FreezeDeadlockPruner:
+    name = "freeze"
+    # (right, left) and (down, up) direction pairs
+    axes = ((1, 3), (0, 2))
+
+    def is_deadlocked(self, level, stones, moved_cell):
+        occupied = set(stones)
+
+        # Only the moved stone and the stones touching it can have become frozen
+        candidates = [moved_cell]
+        for step in level.neighbors:
+            if step[moved_cell] in occupied:
+                candidates.append(step[moved_cell])
+
+        for cell in candidates:
+            group = self.frozen_group(level, occupied, cell, frozenset())
+            if group is not None and any(not level.is_switch[stone] for stone in group):
+                return True
+        return False
+
+    # Return the stones frozen together with cell, or None when cell can still move.
+    # Stones already on the recursion path count as walls to break cycles
+    def frozen_group(self, level, occupied, cell, blocked):
+        is_wall = level.is_wall
+        blocked = blocked | {cell}
+        group = [cell]
+
+        for first, second in self.axes:
+            sides = (level.neighbors[first][cell], level.neighbors[second][cell])
+            if any(side < 0 or is_wall[side] or side in blocked for side in sides):
+                continue
+            if level.is_dead[sides[0]] and level.is_dead[sides[1]]:
+                continue
+
+            for side in sides:
+                if side in occupied:
+                    side_group = self.frozen_group(level, occupied, side, blocked)
+                    if side_group is not None:
+                        group.extend(side_group)
+                        break
+            else:
+                return None
+
+        return group
+
+
+# Stones pushed against a straight wall with no exit can only slide along it, so
+# that wall segment cannot hold more stones than it has switches
+class WallLineDeadlockPruner:
+    name = "wall_line"
+
+    def __init__(self):
+        self.level = None
+        self.lines = {}
+
+    def is_deadlocked(self, level, stones, moved_cell):
+        if level is not self.level:
+            self.level = level
+            self.lines = {}
+
+        occupied = None
+        for side in range(4):
+            line = self.wall_line(level, moved_cell, side)
+            if line is None:
+                continue
+
+            cells, switch_count = line
+            if occupied is None:
+                occupied = set(stones)
+            if sum(cell in occupied for cell in cells) > switch_count:
+                return True
+        return False
+
+    # Floor cells along the wall on the given side of cell and the number of switches
+    # among them, or None when the wall has a gap or the segment is open at an end
+    def wall_line(self, level, cell, side):
+        key = (cell, side)
+        if key in self.lines:
+            return self.lines[key]
+
+        is_wall = level.is_wall
+        wall_step = level.neighbors[side]
+        line = None
+        if wall_step[cell] < 0 or is_wall[wall_step[cell]]:
+            cells = [cell]
+            enclosed = True
+            # Walk both ways along the wall until the segment is closed off
+            for direction in ((side + 1) % 4, (side + 3) % 4):
+                step = level.neighbors[direction]
+                current = step[cell]
+                while current >= 0 and not is_wall[current]:
+                    if wall_step[current] >= 0 and not is_wall[wall_step[current]]:
+                        enclosed = False
+                        break
+                    cells.append(current)
+                    current = step[current]
+                if not enclosed:
+                    break
+
+            if enclosed:
+                line = (tuple(cells), sum(level.is_switch[c] for c in cells))
+
+        self.lines[key] = line
+        return line
+
+
+# Pruners by rule name, for choosing them from configuration
+PRUNERS = {pruner.name: pruner for pruner in (
+    DeadSquarePruner, BlockDeadlockPruner, FreezeDeadlockPruner, WallLineDeadlockPruner)}
@@ -0,0 +1,50 @@
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # Without POSIX locks, appends still rely on O_APPEND alone
+    fcntl = None
+
+# Buffers one JSON object per solve and appends them to a JSON Lines file in a
+# single write, under an exclusive lock, so several processes can share the file
+# without interleaving partial lines
+class ResultsWriter:
+    def __init__(self, filename):
+        self.filename = filename
+        self.lines = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def add(self, record):
+        self.lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def flush(self):
+        if not self.lines:
+            return
+        data = "".join(self.lines).encode()
+        fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+        finally:
+            # Closing the file also releases the lock
+            os.close(fd)
+        self.lines = []
+
+    # One record for a solve; metrics is None when the job died before reporting
+    @staticmethod
+    def solve_record(level_number, algorithm, status, metrics, config):
+        record = {"level": level_number, "algorithm": algorithm, "status": status}
+        if metrics is not None:
+            record.update(metrics.to_record())
+        record["config"] = config
+        return record
@@ -0,0 +1,52 @@
+import multiprocessing
+import queue
+from .SolverRunner import SolverRunner
+
+# Runs in the worker process: solve state and report back over messages as
+# ("progress", progress_dict) while searching, then ("solved", metrics) or
+# ("unsolved", progress_dict)
+def solve_in_worker(state, algorithm, options, messages, progress_interval):
+    solver = SolverRunner.create_solver(algorithm, state, **options)
+    status = SolverRunner.solve(solver, check_interval=256,
+                                on_progress=lambda progress: messages.put(("progress", progress)),
+                                progress_interval=progress_interval)
+    if status == "solved":
+        messages.put(("solved", solver.metrics))
+    else:
+        messages.put(("unsolved", SolverRunner.progress(solver)))
+
+# Solves a level in a separate process so the GUI event loop never runs the search
+class SolveWorker:
+    def __init__(self, state, algorithm, options=None, progress_interval=0.1):
+        # Spawn instead of fork so the child does not inherit the Tk connection
+        context = multiprocessing.get_context("spawn")
+        self.messages = context.Queue()
+        self.process = context.Process(target=solve_in_worker,
+                                       args=(state, algorithm, options or {}, self.messages, progress_interval),
+                                       daemon=True)
+
+    def start(self):
+        self.process.start()
+
+    # Return every message received so far without blocking
+    def poll(self):
+        received = []
+        while True:
+            try:
+                received.append(self.messages.get_nowait())
+            except queue.Empty:
+                return received
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    # Stop the search immediately; safe to call more than once
+    def cancel(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+        self.messages.cancel_join_thread()
+        self.messages.close()
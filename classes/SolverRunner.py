@@ -0,0 +1,109 @@
+import inspect
+import time
+from .AlgorithmMetrics import AlgorithmMetrics
+from .algorithms.BFS import BFSSolver
+from .algorithms.DFS import DFSSolver
+from .algorithms.UCS import UCSSolver
+from .algorithms.A_Star import AStarSolver
+from .algorithms.HDA_Star import HDAStarSolver
+from .algorithms.Bidirectional import BidirectionalSolver
+from .algorithms.IDA_Star import IDAStarSolver
+
+# Builds and drives solvers without any GUI; shared by the GUI and the headless tools
+class SolverRunner:
+    # Keys match the GUI's algorithm radio values, in output order
+    algorithms = {
+        "bfs": BFSSolver,
+        "dfs": DFSSolver,
+        "ucs": UCSSolver,
+        "a_star": AStarSolver,
+        "ida_star": IDAStarSolver,
+        "hda_star": HDAStarSolver,
+        "bidirectional": BidirectionalSolver
+    }
+
+    # Create a solver, passing only the options its constructor accepts. The
+    # memory_sampling option, a (mode, every) pair, and the profile option, nodes
+    # between profiler samples, apply to the whole process, so worker processes
+    # pick them up from the options they are given
+    @staticmethod
+    def create_solver(algorithm, state, **options):
+        if options.get("memory_sampling") is not None:
+            AlgorithmMetrics.configure_sampling(*options["memory_sampling"])
+        if options.get("profile") is not None:
+            AlgorithmMetrics.configure_profiling(options["profile"])
+        solver_class = SolverRunner.algorithms[algorithm]
+        accepted = inspect.signature(solver_class).parameters
+        return solver_class(state, **{name: value for name, value in options.items() if name in accepted})
+
+    # The options create_solver would pass to this algorithm, as plain values
+    @staticmethod
+    def solver_config(algorithm, options):
+        accepted = inspect.signature(SolverRunner.algorithms[algorithm]).parameters
+        config = {name: value for name, value in options.items() if name in accepted}
+        if config.get("pruners") is not None:
+            config["pruners"] = [pruner.name for pruner in config["pruners"]]
+        return config
+
+    # Expand states until the solver finds a solution, runs out of states or hits
+    # its operation limit; returns True when solved
+    @staticmethod
+    def run(solver, operation_limit=None, time_limit=None):
+        return SolverRunner.solve(solver, operation_limit, time_limit) == "solved"
+
+    # Same as run, but returns "solved", "unsolved", "timeout" or "error" (the solver
+    # set its error attribute, e.g. a worker process died); time_limit is in
+    # seconds, and on_progress is called with progress(solver) at most every
+    # progress_interval seconds; both are checked every check_interval operations
+    @staticmethod
+    def solve(solver, operation_limit=None, time_limit=None, check_interval=1000,
+              on_progress=None, progress_interval=0.1):
+        if operation_limit is None:
+            operation_limit = solver.operation_limit
+        now = time.perf_counter()
+        deadline = None if time_limit is None else now + time_limit
+        next_progress = now + progress_interval
+
+        try:
+            operations = 0
+            while operations < operation_limit:
+                operations += 1
+                if solver.process_one_state():
+                    return "solved"
+                if not solver.frontier_size():
+                    break
+                if operations % check_interval == 0 and (deadline is not None or on_progress is not None):
+                    now = time.perf_counter()
+                    if deadline is not None and now > deadline:
+                        # Anytime searches keep the best solution published so far
+                        return "solved" if solver.solution else "timeout"
+                    if on_progress is not None and now >= next_progress:
+                        on_progress(SolverRunner.progress(solver))
+                        next_progress = now + progress_interval
+
+            if solver.solution:
+                return "solved"
+            return "error" if getattr(solver, "error", None) else "unsolved"
+        finally:
+            # Solvers that search in their own processes shut them down here
+            stop_workers = getattr(solver, "stop_workers", None)
+            if stop_workers is not None:
+                stop_workers()
+
+    # Snapshot of a running search; best_f is the cost (UCS) or f value (A*) of the
+    # last expanded node, None for solvers without priorities
+    @staticmethod
+    def progress(solver):
+        return {
+            "nodes": solver.metrics.nodes_explored,
+            "frontier": solver.frontier_size(),
+            "best_f": getattr(solver, "last_f", None)
+        }
+
+    # Install a solution found elsewhere (e.g. in a worker process) into a fresh
+    # solver of the same level, so it can be replayed step by step
+    @staticmethod
+    def restore_solution(solver, metrics):
+        solver.metrics = metrics
+        solver.solution = [solver.char_to_dir[c] for c in metrics.solution_path]
+        solver.current_step = -1
@@ -0,0 +1,105 @@
+from .GameState import GameState
+
+# Spread a compact key over 64 bits (Fibonacci hashing) for hash tables and
+# partitioning; the raw ints vary mostly in their low bits. Use the high bits
+def mix_key(key):
+    return (hash(key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+
+# Stone part of a key: "slots" packs one cell index per stone slot, "bitset" packs
+# one cell bitset per weight class. Both are canonical for stones of equal weight
+KEY_LAYOUTS = ("slots", "bitset")
+
+class StateEncoder:
+    def __init__(self, initial_state, key_layout="slots"):
+        if key_layout not in KEY_LAYOUTS:
+            raise ValueError(f"Unknown key layout: {key_layout}")
+        self.width = initial_state.width
+        self.height = initial_state.height
+        self.initial_state = initial_state
+        self.key_layout = key_layout
+
+        # Every cell index (y * width + x) fits in a fixed number of bits
+        num_cells = max(self.width * self.height, 2)
+        self.num_cells = num_cells
+        self.cell_bits = (num_cells - 1).bit_length()
+        self.cell_mask = (1 << self.cell_bits) - 1
+
+        # Stones are stored in slots ordered by (weight, cell), so each slot has a fixed
+        # weight and stones of equal weight stay interchangeable
+        slots = sorted((weight, self.cell_index(pos)) for pos, weight in initial_state.stones.items())
+        self.weights = tuple(weight for weight, _ in slots)
+        self.num_stones = len(self.weights)
+
+        # Slot range (start, end) of every weight class, lightest first
+        self.classes = tuple((self.weights.index(weight), len(self.weights) - self.weights[::-1].index(weight))
+                             for weight in sorted(set(self.weights)))
+        if key_layout == "bitset":
+            self.pack = self.pack_bitsets
+            self.unpack = self.unpack_bitsets
+            self.key_bits = self.cell_bits + num_cells * len(self.classes)
+        else:
+            self.key_bits = self.cell_bits * (self.num_stones + 1)
+
+    def cell_index(self, pos):
+        return pos[1] * self.width + pos[0]
+
+    def cell_pos(self, cell):
+        return (cell % self.width, cell // self.width)
+
+    # Pack the player cell and the stone cells into a single int
+    def pack(self, player_cell, stone_cells):
+        key = 0
+        for cell in reversed(stone_cells):
+            key = (key << self.cell_bits) | cell
+        return (key << self.cell_bits) | player_cell
+
+    def unpack(self, key):
+        mask = self.cell_mask
+        bits = self.cell_bits
+        player_cell = key & mask
+        stone_cells = []
+        for _ in range(self.num_stones):
+            key >>= bits
+            stone_cells.append(key & mask)
+        return player_cell, tuple(stone_cells)
+
+    # Bitset layout: the stone cells of each weight class as one num_cells-bit set,
+    # so stones of a class can sit in any order. Slots stay sorted by cell when unpacked
+    def pack_bitsets(self, player_cell, stone_cells):
+        key = 0
+        for start, end in reversed(self.classes):
+            bits = 0
+            for cell in stone_cells[start:end]:
+                bits |= 1 << cell
+            key = (key << self.num_cells) | bits
+        return (key << self.cell_bits) | player_cell
+
+    def unpack_bitsets(self, key):
+        player_cell = key & self.cell_mask
+        key >>= self.cell_bits
+        cell_set_mask = (1 << self.num_cells) - 1
+        stone_cells = []
+        for _ in self.classes:
+            bits = key & cell_set_mask
+            key >>= self.num_cells
+            while bits:
+                low = bits & -bits
+                stone_cells.append(low.bit_length() - 1)
+                bits ^= low
+        return player_cell, tuple(stone_cells)
+
+    def encode(self, state):
+        slots = sorted((weight, self.cell_index(pos)) for pos, weight in state.stones.items())
+        return self.pack(self.cell_index(state.player_pos), [cell for _, cell in slots])
+
+    def decode(self, key):
+        player_cell, stone_cells = self.unpack(key)
+        new_state = GameState()
+        new_state.width = self.width
+        new_state.height = self.height
+        new_state.walls = self.initial_state.walls
+        new_state.switches = self.initial_state.switches
+        new_state.player_pos = self.cell_pos(player_cell)
+        new_state.stones = {self.cell_pos(cell): weight for cell, weight in zip(stone_cells, self.weights)}
+        new_state.player_on_switch = new_state.player_pos in new_state.switches
+        return new_state
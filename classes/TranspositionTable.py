@@ -0,0 +1,52 @@
+from array import array
+
+# Fixed-size two-tier table of the cheapest cost each state was reached with,
+# indexed by the state's Zobrist hash and verified against its full key.
+# Every bucket has a first-tier entry that keeps the cheapest visit (the one with
+# the most search left below it) and a second-tier entry that is always replaced,
+# so memory stays at the budget no matter how many states the search touches
+class TranspositionTable:
+    # Rough size of one entry: the list slot, the key int object, cost and stamp
+    entry_bytes = 64
+
+    def __init__(self, memory_mb):
+        self.size = max(1, int(memory_mb * 1024 * 1024) // (2 * self.entry_bytes))
+        self.keys = [None] * (2 * self.size)
+        self.costs = array('q', [0]) * (2 * self.size)
+        # Entries from older searches are ignored instead of cleared
+        self.stamps = array('i', [0]) * (2 * self.size)
+        self.stamp = 1
+        self.replacements = 0
+
+    def __len__(self):
+        return 2 * self.size
+
+    def new_search(self):
+        self.stamp += 1
+
+    # Record that key (with Zobrist hash zobrist) was reached with cost g; True when
+    # it was already reached at least as cheaply in this search, so the visit can be skipped
+    def visit(self, key, g, zobrist):
+        first = 2 * (zobrist % self.size)
+        second = first + 1
+        keys, costs, stamps, stamp = self.keys, self.costs, self.stamps, self.stamp
+
+        for slot in (first, second):
+            if stamps[slot] == stamp and keys[slot] == key:
+                if costs[slot] <= g:
+                    return True
+                costs[slot] = g
+                return False
+
+        if stamps[first] != stamp or g < costs[first]:
+            # Demote the first-tier entry rather than dropping it
+            if stamps[first] == stamp:
+                if stamps[second] == stamp:
+                    self.replacements += 1
+                keys[second], costs[second], stamps[second] = keys[first], costs[first], stamp
+            keys[first], costs[first], stamps[first] = key, g, stamp
+        else:
+            if stamps[second] == stamp:
+                self.replacements += 1
+            keys[second], costs[second], stamps[second] = key, g, stamp
+        return False
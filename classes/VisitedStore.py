@@ -0,0 +1,105 @@
+import mmap
+import tempfile
+from .StateEncoder import mix_key
+
+# Visited-set backends for the solvers. All of them support `in`, add() and len()
+# on compact state keys, so a solver can swap a plain set for one of these
+
+
+# Open-addressing hash set that stores every key in a fixed number of bytes of a
+# flat buffer, instead of one Python int object per key
+class CompactVisitedSet:
+    name = "compact"
+    # Grow once this share of the slots is used
+    max_load = 0.5
+
+    # capacity must be a power of two
+    def __init__(self, key_bits, capacity=1 << 16):
+        # Keys are stored as key + 1, so an all-zero slot is empty
+        self.key_bytes = (key_bits + 8) // 8
+        self.empty = bytes(self.key_bytes)
+        self.size = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        self.capacity = capacity
+        self.mask = capacity - 1
+        # Slot index from the top bits of the mixed key
+        self.shift = 64 - (capacity.bit_length() - 1)
+        self.table = self.create_buffer(capacity * self.key_bytes)
+
+    def create_buffer(self, length):
+        return bytearray(length)
+
+    def release_buffer(self, buffer):
+        pass
+
+    def __len__(self):
+        return self.size
+
+    # Byte offset of key's slot, or of the empty slot where it would go
+    def find(self, stored, key):
+        table, key_bytes, mask, empty = self.table, self.key_bytes, self.mask, self.empty
+        index = mix_key(key) >> self.shift
+        while True:
+            offset = index * key_bytes
+            current = table[offset:offset + key_bytes]
+            if current == stored or current == empty:
+                return offset, current == stored
+            index = (index + 1) & mask
+
+    def __contains__(self, key):
+        return self.find((key + 1).to_bytes(self.key_bytes, 'little'), key)[1]
+
+    def add(self, key):
+        stored = (key + 1).to_bytes(self.key_bytes, 'little')
+        offset, found = self.find(stored, key)
+        if found:
+            return
+        self.table[offset:offset + self.key_bytes] = stored
+        self.size += 1
+        if self.size > self.capacity * self.max_load:
+            self.grow()
+
+    def grow(self):
+        old_table = self.table
+        key_bytes = self.key_bytes
+        self.allocate(self.capacity * 2)
+
+        for offset in range(0, len(old_table), key_bytes):
+            stored = old_table[offset:offset + key_bytes]
+            if stored != self.empty:
+                new_offset, _ = self.find(stored, int.from_bytes(stored, 'little') - 1)
+                self.table[new_offset:new_offset + key_bytes] = stored
+
+        self.release_buffer(old_table)
+
+
+# Same table in a memory-mapped temporary file, so the OS can page it out to disk
+# instead of the process running out of memory; directory defaults to TMPDIR
+class DiskVisitedSet(CompactVisitedSet):
+    name = "disk"
+
+    def __init__(self, key_bits, capacity=1 << 20, directory=None):
+        self.directory = directory
+        super().__init__(key_bits, capacity)
+
+    def create_buffer(self, length):
+        # The mapping outlives the file object, and the file is deleted on close
+        with tempfile.TemporaryFile(dir=self.directory) as file:
+            file.truncate(length)
+            return mmap.mmap(file.fileno(), length)
+
+    def release_buffer(self, buffer):
+        buffer.close()
+
+
+VISITED_STORES = {"memory": set, CompactVisitedSet.name: CompactVisitedSet, DiskVisitedSet.name: DiskVisitedSet}
+
+# Empty visited set of the given kind for keys made by encoder
+def create_visited_store(kind, encoder):
+    if kind not in VISITED_STORES:
+        raise ValueError(f"Unknown visited store: {kind}")
+    if kind == "memory":
+        return set()
+    return VISITED_STORES[kind](encoder.key_bits)
@@ -1,16 +1,45 @@
 from ..CharacterMove import CharacterMove
-from ..GameState import GameState
+from ..Level import Level
+from ..NodeTable import NodeTable
+from ..Pruners import DeadSquarePruner
 from ..AlgorithmMetrics import AlgorithmMetrics
+from ..BucketQueue import BucketQueue
+import numpy
+from functools import partial
 from heapq import heappop, heappush
 from scipy.optimize import linear_sum_assignment
 
+INF = float('inf')
+
 class AStarSolver:
-    def __init__(self, initial_state):
+    # Label written to output-XX.txt
+    algorithm_name = "A*"
+
+    def __init__(self, initial_state, push_mode=False, pruners=None, queue_type="heap", tie_policy="fifo",
+                 weight=1.0, anytime=False, weight_step=0.5):
         self.initial_state = initial_state
+        # Expand whole stone pushes instead of single player steps
+        self.push_mode = push_mode
+        # Weighted A* ranks states by g + weight * h, rounded down to keep f integer;
+        # anytime search starts at weight and lowers it by weight_step after every
+        # solution until it reaches 1 and the solution is optimal
+        if weight < 1:
+            raise ValueError("weight must be at least 1")
+        if anytime and push_mode:
+            raise ValueError("anytime search runs in step mode")
+        self.weight = weight
+        self.anytime = anytime
+        self.weight_step = weight_step
+        # "heap" for heapq, "bucket" for a BucketQueue keyed by integer cost
+        self.queue_type = queue_type
+        self.tie_policy = tie_policy
         self.solution = None
         self.current_step = -1
         self.operation_limit = 10**6
         self.character_move = CharacterMove()
+        self.level = Level(initial_state)
+        self.encoder = self.level.encoder
+        self.pruners = [DeadSquarePruner()] if pruners is None else pruners
         self.dir_to_char = {
             (0, 1): 'D', (1, 0): 'R',
             (0, -1): 'U', (-1, 0): 'L'
@@ -22,90 +51,338 @@ class AStarSolver:
 
         self.directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
         self.index = 0
+
+        # Cost of pushing each slot's stone from every cell to every switch:
+        # push distance times the (1 + weight) cost of a single push
+        push_costs = numpy.array([weight + 1 for weight in self.level.weights], dtype=numpy.int64)
+        self.slot_costs = self.level.push_distances.T[None, :, :] * push_costs[:, None, None]
+        self.slots = numpy.arange(len(self.level.weights))
+
         self.metrics = AlgorithmMetrics()
         self.reset_solver()
 
     def reset_solver(self):
         compressed_initial = self.compress_state(self.initial_state)
-        initial_h = self.heuristic(self.initial_state)
+        # Entries carry their heuristic assignment so children can repair it
+        initial_assignment = self.level.assignment(self.level.initial_stones)
+        self.current_weight = self.weight
+        initial_f = int(self.current_weight * initial_assignment.total)
         # Added total_weight tracking (g is now actual weight, not just steps)
-        self.priority_queue = [(initial_h, 0, 0, compressed_initial, "", 0)]
-        self.visited = {compressed_initial}
+        self.create_queue()
+        self.queue_push((initial_f, 0, 0, compressed_initial, 0, 0, initial_assignment))
+        if self.anytime:
+            # Cheapest known g of every state, states expanded at the current
+            # weight, and states improved after their expansion (ARA*'s INCONS)
+            self.best_g = {compressed_initial: 0}
+            self.closed = set()
+            self.incons = {}
+            self.incumbent = INF
+        elif self.push_mode:
+            # Cheapest known g of every raw state (the player where the push left
+            # it), and the expanded player regions: the stone part of a key maps to
+            # the bitmask of the player cells already covered
+            self.best_g = {compressed_initial: 0}
+            self.closed_regions = {}
+        elif self.weight != 1:
+            # Weighted search closes states when popped and keeps only the cheapest
+            # route to each open state, so the first solution is within the weight
+            # of optimal (the heuristic is consistent)
+            self.visited = set()
+            self.best_g = {compressed_initial: 0}
+        else:
+            self.visited = {compressed_initial}
         self.index = 0
+        self.last_f = None
+        self.nodes = NodeTable(with_cells=self.push_mode)
         self.metrics = AlgorithmMetrics()
         self.metrics.start_tracking()
 
+    def create_queue(self):
+        if self.queue_type == "bucket":
+            self.priority_queue = BucketQueue(self.tie_policy)
+            self.queue_push = self.priority_queue.push
+            self.queue_pop = self.priority_queue.pop
+        elif self.queue_type == "heap":
+            self.priority_queue = []
+            self.queue_push = partial(heappush, self.priority_queue)
+            self.queue_pop = partial(heappop, self.priority_queue)
+        else:
+            raise ValueError(f"Unknown queue type: {self.queue_type}")
+
     def compress_state(self, state):
-        stones = tuple(sorted((pos, weight) for pos, weight in state.stones.items()))
-        return (state.player_pos, stones)
+        return self.encoder.encode(state)
 
     def decompress_state(self, compressed):
-        player_pos, stones = compressed
-        new_state = GameState()
-        new_state.width = self.initial_state.width
-        new_state.height = self.initial_state.height
-        new_state.walls = self.initial_state.walls
-        new_state.switches = self.initial_state.switches
-        new_state.player_pos = player_pos
-        new_state.stones = dict(stones)
-        new_state.player_on_switch = player_pos in new_state.switches
-        return new_state
+        return self.encoder.decode(compressed)
+
+    def frontier_size(self):
+        if self.anytime:
+            return len(self.priority_queue) + len(self.incons)
+        return len(self.priority_queue)
 
     def process_one_state(self):
+        if self.anytime:
+            return self.process_anytime_state()
+
         if not self.priority_queue:
             return False
 
-        f, g, _, compressed_current, path, total_weight = heappop(self.priority_queue)
-        current_state = self.decompress_state(compressed_current)
+        if self.push_mode:
+            return self.process_push_state()
+
+        profiler = self.metrics.profiler
+        profiler.start()
+        f, g, _, compressed_current, node, total_weight, assignment = self.queue_pop()
+        self.last_f = f
+        weighted = self.weight != 1
+        if weighted:
+            if compressed_current in self.visited or g > self.best_g[compressed_current]:
+                profiler.lap("pop")
+                return False
+            self.visited.add(compressed_current)
+        profiler.lap("pop")
+        player, stones = self.encoder.unpack(compressed_current)
+        profiler.lap("decompress")
         self.metrics.nodes_explored += 1
+        profiler.node(len(self.priority_queue), len(self.visited))
 
         # Update peak memory after processing each state
         self.metrics.update_peak_memory()
 
-        if current_state.is_solved():
+        if self.level.is_solved(stones):
+            path = self.nodes.path(node)
             self.solution = [self.char_to_dir[c] for c in path]
             self.current_step = -1
             self.metrics.stop_tracking()
             self.metrics.total_steps = len(path)
             self.metrics.total_weight = total_weight
             self.metrics.solution_path = path
+            if self.weight != 1:
+                self.metrics.suboptimality_bound = self.weight
             return True
+        profiler.lap("is_solved")
 
-        x, y = current_state.player_pos
-        for dx, dy in self.directions:
-            if self.character_move.can_move(current_state, x, y, dx, dy):
-                new_state = self.character_move.make_move(current_state, x, y, dx, dy)
-                compressed_new = self.compress_state(new_state)
+        for direction, new_player, new_stones, pushed in self.character_move.successors(self.level, player, stones):
+            # Skip pushes that leave the level unsolvable
+            if pushed >= 0 and self.character_move.is_pruned(self.pruners, self.level, new_stones,
+                                                             self.level.neighbors[direction][new_player], self.metrics):
+                profiler.lap("moves")
+                continue
+            profiler.lap("moves")
 
-                if compressed_new not in self.visited:
+            # Determine if this move is pushing a stone
+            is_push = pushed >= 0
+
+            # Calculate actual move weight
+            move_weight = 1
+            if is_push:
+                move_weight += self.level.weights[pushed]
+
+            compressed_new = self.encoder.pack(new_player, new_stones)
+            seen = compressed_new in self.visited
+            if weighted and not seen:
+                seen = g + move_weight >= self.best_g.get(compressed_new, INF)
+            profiler.lap("hash")
+
+            if not seen:
+                if weighted:
+                    self.best_g[compressed_new] = g + move_weight
+                else:
                     self.visited.add(compressed_new)
-                    self.index += 1
+                self.index += 1
+
+                # Get direction and convert case based on push/move
+                dir_char = self.dir_to_char[self.directions[direction]]
+                dir_char = dir_char.upper() if is_push else dir_char.lower()
+                new_node = self.nodes.add(node, ord(dir_char))
+
+                # A walk keeps the parent's heuristic, a push repairs one row of it
+                new_assignment = assignment
+                if is_push:
+                    # Path bookkeeping counts as move generation
+                    profiler.lap("moves")
+                    new_assignment = self.level.repair_assignment(assignment, new_stones, pushed,
+                                                                  self.level.neighbors[direction][new_player])
+                    profiler.lap("heuristic")
+
+                # Calculate new costs
+                new_total_weight = total_weight + move_weight
+                new_g = g + move_weight
+                new_f = new_g + int(self.current_weight * new_assignment.total)
+                profiler.lap("moves")
+
+                self.queue_push((new_f, new_g, self.index, compressed_new, new_node,
+                                 new_total_weight, new_assignment))
+                profiler.lap("push")
+
+        profiler.lap("moves")
+        return False
+
+    def process_push_state(self):
+        f, g, _, compressed_current, node, total_weight, assignment = self.queue_pop()
+        self.last_f = f
+        if g > self.best_g[compressed_current]:
+            return False
+        player, stones = self.encoder.unpack(compressed_current)
+        stones_key = compressed_current >> self.encoder.cell_bits
+        closed = self.closed_regions.get(stones_key, 0)
+        if closed >> player & 1:
+            return False
+        occupied = set(stones)
+        reach = self.character_move.reachable(self.level, player, occupied)
+        self.closed_regions[stones_key] = closed | self.character_move.region_mask(reach)
+        self.metrics.nodes_explored += 1
+
+        # Update peak memory after processing each state
+        self.metrics.update_peak_memory()
+
+        if self.level.is_solved(stones):
+            path, total_weight = self.character_move.expand_pushes(self.level, self.nodes.pushes(node))
+            self.solution = [self.char_to_dir[c] for c in path]
+            self.current_step = -1
+            self.metrics.stop_tracking()
+            self.metrics.total_steps = len(path)
+            self.metrics.total_weight = total_weight
+            self.metrics.solution_path = path
+            # No bound: push mode is not cost-optimal even at weight 1
+            return True
 
-                    # Determine if this move is pushing a stone
-                    new_pos = (x + dx, y + dy)
-                    is_push = new_pos in current_state.stones
+        for direction, from_cell, new_stones, pushed in self.character_move.pushes(self.level, stones, occupied, reach):
+            new_player = self.level.neighbors[direction][from_cell]
 
-                    # Calculate actual move weight
-                    move_weight = 1
-                    if is_push:
-                        move_weight += current_state.get_weight(*new_pos)
+            # Skip pushes that leave the level unsolvable
+            if self.character_move.is_pruned(self.pruners, self.level, new_stones,
+                                             self.level.neighbors[direction][new_player], self.metrics):
+                continue
 
-                    # Get direction and convert case based on push/move
-                    dir_char = self.dir_to_char[(dx, dy)]
-                    dir_char = dir_char.upper() if is_push else dir_char.lower()
-                    new_path = path + dir_char
+            # Walk to the stone, then push it
+            move_weight = reach[from_cell] + 1 + self.level.weights[pushed]
+            compressed_new = self.encoder.pack(new_player, new_stones)
+            new_g = g + move_weight
 
-                    # Calculate new costs
-                    new_total_weight = total_weight + move_weight
-                    new_g = g + move_weight
-                    new_h = self.heuristic(new_state)
-                    new_f = new_g + new_h
+            # Routes that are no cheaper, or into an expanded region, are dropped
+            # before they cost a heuristic repair and a flood fill
+            if new_g >= self.best_g.get(compressed_new, INF) or \
+                    self.closed_regions.get(compressed_new >> self.encoder.cell_bits, 0) >> new_player & 1:
+                continue
+            self.best_g[compressed_new] = new_g
+            self.index += 1
 
-                    heappush(self.priority_queue,
-                            (new_f, new_g, self.index, compressed_new, new_path, new_total_weight))
+            new_assignment = self.level.repair_assignment(assignment, new_stones, pushed,
+                                                          self.level.neighbors[direction][new_player])
+            new_f = new_g + int(self.current_weight * new_assignment.total)
+            self.queue_push((new_f, new_g, self.index, compressed_new,
+                             self.nodes.add(node, direction, from_cell), total_weight + move_weight,
+                             new_assignment))
 
         return False
 
+    # ARA*-style anytime search: weighted A* with reopening that publishes a
+    # solution whenever it finds a cheaper one, then lowers the weight and carries
+    # on with the states it already has
+    def process_anytime_state(self):
+        if not self.priority_queue:
+            return self.finish_iteration()
+
+        entry = self.queue_pop()
+        f, g, _, compressed_current, node, total_weight, assignment = entry
+        if g > self.best_g[compressed_current] or compressed_current in self.closed:
+            return False
+        if f >= self.incumbent:
+            # No state left can improve on the incumbent at this weight
+            self.queue_push(entry)
+            return self.finish_iteration()
+
+        self.last_f = f
+        self.closed.add(compressed_current)
+        player, stones = self.encoder.unpack(compressed_current)
+        self.metrics.nodes_explored += 1
+
+        # Update peak memory after processing each state
+        self.metrics.update_peak_memory()
+
+        if self.level.is_solved(stones):
+            self.incumbent = g
+            path = self.nodes.path(node)
+            self.solution = [self.char_to_dir[c] for c in path]
+            self.current_step = -1
+            self.metrics.stop_tracking()
+            self.metrics.total_steps = len(path)
+            self.metrics.total_weight = total_weight
+            self.metrics.solution_path = path
+            self.metrics.record_improvement(total_weight, self.current_weight, self.cost_bound())
+            return False
+
+        for direction, new_player, new_stones, pushed in self.character_move.successors(self.level, player, stones):
+            # Skip pushes that leave the level unsolvable
+            if pushed >= 0 and self.character_move.is_pruned(self.pruners, self.level, new_stones,
+                                                             self.level.neighbors[direction][new_player], self.metrics):
+                continue
+
+            is_push = pushed >= 0
+            move_weight = 1
+            new_assignment = assignment
+            if is_push:
+                move_weight += self.level.weights[pushed]
+                new_assignment = self.level.repair_assignment(assignment, new_stones, pushed,
+                                                              self.level.neighbors[direction][new_player])
+
+            # Only routes that can still beat the incumbent are worth keeping
+            new_g = g + move_weight
+            compressed_new = self.encoder.pack(new_player, new_stones)
+            if new_g + new_assignment.total >= self.incumbent or new_g >= self.best_g.get(compressed_new, INF):
+                continue
+            self.best_g[compressed_new] = new_g
+
+            dir_char = self.dir_to_char[self.directions[direction]]
+            dir_char = dir_char.upper() if is_push else dir_char.lower()
+            self.index += 1
+            new_entry = (new_g + int(self.current_weight * new_assignment.total), new_g, self.index,
+                         compressed_new, self.nodes.add(node, ord(dir_char)), total_weight + move_weight,
+                         new_assignment)
+            if compressed_new in self.closed:
+                self.incons[compressed_new] = new_entry
+            else:
+                self.queue_push(new_entry)
+
+        return False
+
+    # Called when the current weight cannot improve the incumbent any further;
+    # True once the incumbent is proven optimal
+    def finish_iteration(self):
+        if self.current_weight == 1:
+            if self.solution is not None:
+                self.metrics.suboptimality_bound = 1.0
+                return True
+            # Nothing left to search and no solution: the level is unsolvable
+            self.create_queue()
+            self.incons = {}
+            return False
+
+        if self.solution is not None:
+            self.metrics.suboptimality_bound = self.cost_bound()
+
+        # Requeue open and inconsistent states under the lower weight
+        self.current_weight = max(1.0, self.current_weight - self.weight_step)
+        entries = list(self.priority_queue) + list(self.incons.values())
+        self.create_queue()
+        self.incons = {}
+        self.closed = set()
+        for _, g, index, compressed, node, total_weight, assignment in entries:
+            if g == self.best_g[compressed]:
+                self.queue_push((g + int(self.current_weight * assignment.total), g, index, compressed,
+                                 node, total_weight, assignment))
+        return False
+
+    # Incumbent cost over the smallest unweighted f still queued, a lower bound on
+    # the optimal cost; never more than the current weight
+    def cost_bound(self):
+        lower = min((entry[1] + entry[6].total for entry in self.priority_queue), default=INF)
+        lower = min([lower] + [entry[1] + entry[6].total for entry in self.incons.values()])
+        if lower >= self.incumbent:
+            return 1.0
+        return min(self.current_weight, self.incumbent / lower) if lower > 0 else self.current_weight
+
     def can_move(self, state, x, y, dx, dy):
         return self.character_move.can_move(state, x, y, dx, dy)
 
@@ -124,27 +401,18 @@ class AStarSolver:
 
     # Hungarian algorithm heuristic
     def heuristic(self, state):
-        box_positions = state.get_boxes()
-        goal_positions = state.get_goals()
-
-        # Initialize the cost matrix with dimensions [num_boxes x num_goals]
-        cost_matrix = []
-        for box in box_positions:
-            box_costs = []
-            for goal in goal_positions:
-                distance = abs(box[0] - goal[0]) + abs(box[1] - goal[1])
-                weight = state.get_weight(box[0], box[1])
-                # Factor in weight for moving the stone
-                box_costs.append(distance * (weight + 1))
-            cost_matrix.append(box_costs)
+        _, stone_cells = self.encoder.unpack(self.encoder.encode(state))
+        return self.heuristic_cells(stone_cells)
+
+    def heuristic_cells(self, stone_cells):
+        # Cost matrix with dimensions [num_boxes x num_goals], read from the precomputed table
+        cost_matrix = self.slot_costs[self.slots, stone_cells]
 
         # Apply Hungarian algorithm to find minimum cost assignment
         row_ind, col_ind = linear_sum_assignment(cost_matrix)
 
         # Sum up the minimum costs for each assigned box-goal pair
-        total_cost = sum(cost_matrix[row][col] for row, col in zip(row_ind, col_ind))
-
-        return total_cost
+        return int(cost_matrix[row_ind, col_ind].sum())
 
     def save_metrics(self, level_number):
-        self.metrics.save_to_file("A*", level_number)
+        self.metrics.save_to_file(self.algorithm_name, level_number)
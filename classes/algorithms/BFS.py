@@ -1,15 +1,30 @@
 from collections import deque
 from ..CharacterMove import CharacterMove
-from ..GameState import GameState
+from ..Level import Level
+from ..NodeTable import NodeTable
+from ..Pruners import DeadSquarePruner
 from ..AlgorithmMetrics import AlgorithmMetrics
+from ..VisitedStore import create_visited_store
 
 class BFSSolver:
-    def __init__(self, initial_state):
+    # Label written to output-XX.txt
+    algorithm_name = "BFS"
+
+    def __init__(self, initial_state, push_mode=False, pruners=None, visited_store="memory", key_layout="slots"):
         self.initial_state = initial_state
+        # Expand whole stone pushes instead of single player steps
+        self.push_mode = push_mode
+        # "memory", "compact" or "disk"; see VisitedStore
+        self.visited_store = visited_store
+        # "slots" or "bitset" state keys; see StateEncoder
+        self.key_layout = key_layout
         self.solution = None
         self.current_step = -1
         self.operation_limit = 10**6
         self.character_move = CharacterMove()
+        self.level = Level(initial_state, key_layout)
+        self.encoder = self.level.encoder
+        self.pruners = [DeadSquarePruner()] if pruners is None else pruners
         self.dir_to_char = {
             (0, 1): 'D', (1, 0): 'R',
             (0, -1): 'U', (-1, 0): 'L'
@@ -27,39 +42,48 @@ class BFSSolver:
 
     def reset_solver(self):
         compressed_initial = self.compress_state(self.initial_state)
-        self.queue = deque([(compressed_initial, "", 0)])
-        self.visited = {compressed_initial}
+        self.queue = deque([(compressed_initial, 0, 0)])
+        self.visited = create_visited_store(self.visited_store, self.encoder)
+        # Step mode marks states visited when generated. Push mode marks the raw
+        # states (the player where the push left it) when queued, and closes every
+        # expanded player region: the stone part of a key maps to the bitmask of
+        # the player cells already covered, so duplicates skip the flood fill
+        self.visited.add(compressed_initial)
+        self.closed_regions = {}
+        self.nodes = NodeTable(with_cells=self.push_mode)
         self.metrics = AlgorithmMetrics()
         self.metrics.start_tracking()
 
     def compress_state(self, state):
-        stones = tuple(sorted((pos, weight) for pos, weight in state.stones.items()))
-        return (state.player_pos, stones)
+        return self.encoder.encode(state)
 
     def decompress_state(self, compressed):
-        player_pos, stones = compressed
-        new_state = GameState()
-        new_state.width = self.initial_state.width
-        new_state.height = self.initial_state.height
-        new_state.walls = self.initial_state.walls
-        new_state.switches = self.initial_state.switches
-        new_state.player_pos = player_pos
-        new_state.stones = dict(stones)
-        new_state.player_on_switch = player_pos in new_state.switches
-        return new_state
+        return self.encoder.decode(compressed)
+
+    def frontier_size(self):
+        return len(self.queue)
 
     def process_one_state(self):
         if not self.queue:
             return False
 
-        compressed_current, path, current_weight = self.queue.popleft()
-        current_state = self.decompress_state(compressed_current)
+        if self.push_mode:
+            return self.process_push_state()
+
+        profiler = self.metrics.profiler
+        profiler.start()
+        compressed_current, node, current_weight = self.queue.popleft()
+        profiler.lap("pop")
+        player, stones = self.encoder.unpack(compressed_current)
+        profiler.lap("decompress")
         self.metrics.nodes_explored += 1
+        profiler.node(len(self.queue), len(self.visited))
 
         # Update peak memory after processing each state
         self.metrics.update_peak_memory()
 
-        if current_state.is_solved():
+        if self.level.is_solved(stones):
+            path = self.nodes.path(node)
             self.solution = [self.char_to_dir[c] for c in path]
             self.current_step = -1
             self.metrics.stop_tracking()
@@ -67,36 +91,93 @@ class BFSSolver:
             self.metrics.total_weight = current_weight
             self.metrics.solution_path = path
             return True
+        profiler.lap("is_solved")
+
+        for direction, new_player, new_stones, pushed in self.character_move.successors(self.level, player, stones):
+            # Skip pushes that leave the level unsolvable
+            if pushed >= 0 and self.character_move.is_pruned(self.pruners, self.level, new_stones,
+                                                             self.level.neighbors[direction][new_player], self.metrics):
+                profiler.lap("moves")
+                continue
+            profiler.lap("moves")
+
+            compressed_new = self.encoder.pack(new_player, new_stones)
+            seen = compressed_new in self.visited
+            profiler.lap("hash")
+
+            if not seen:
+                self.visited.add(compressed_new)
+
+                # Determine if this move is a push
+                is_push = pushed >= 0
+
+                # Get the direction character
+                dir_char = self.dir_to_char[self.directions[direction]]
+                dir_char = dir_char.upper() if is_push else dir_char.lower()
+                new_node = self.nodes.add(node, ord(dir_char))
+
+                # Calculate weight
+                move_weight = 1
+                if is_push:
+                    move_weight += self.level.weights[pushed]
+
+                profiler.lap("moves")
+
+                self.queue.append((compressed_new, new_node, current_weight + move_weight))
+                profiler.lap("push")
+
+        profiler.lap("moves")
+        return False
+
+    def process_push_state(self):
+        compressed_current, node, current_weight = self.queue.popleft()
+        player, stones = self.encoder.unpack(compressed_current)
+        stones_key = compressed_current >> self.encoder.cell_bits
+        closed = self.closed_regions.get(stones_key, 0)
+        if closed >> player & 1:
+            return False
+        occupied = set(stones)
+        reach = self.character_move.reachable(self.level, player, occupied)
+        self.closed_regions[stones_key] = closed | self.character_move.region_mask(reach)
+        self.metrics.nodes_explored += 1
 
-        x, y = current_state.player_pos
-        for dx, dy in self.directions:
-            if self.character_move.can_move(current_state, x, y, dx, dy):
-                new_state = self.character_move.make_move(current_state, x, y, dx, dy)
-                compressed_new = self.compress_state(new_state)
+        # Update peak memory after processing each state
+        self.metrics.update_peak_memory()
 
-                if compressed_new not in self.visited:
-                    self.visited.add(compressed_new)
+        if self.level.is_solved(stones):
+            path, total_weight = self.character_move.expand_pushes(self.level, self.nodes.pushes(node))
+            self.solution = [self.char_to_dir[c] for c in path]
+            self.current_step = -1
+            self.metrics.stop_tracking()
+            self.metrics.total_steps = len(path)
+            self.metrics.total_weight = total_weight
+            self.metrics.solution_path = path
+            return True
 
-                    # Determine if this move is a push
-                    new_pos = (x + dx, y + dy)
-                    is_push = new_pos in current_state.stones
+        for direction, from_cell, new_stones, pushed in self.character_move.pushes(self.level, stones, occupied, reach):
+            new_player = self.level.neighbors[direction][from_cell]
 
-                    # Get the direction character
-                    dir_char = self.dir_to_char[(dx, dy)]
-                    dir_char = dir_char.upper() if is_push else dir_char.lower()
-                    new_path = path + dir_char
+            # Skip pushes that leave the level unsolvable
+            if self.character_move.is_pruned(self.pruners, self.level, new_stones,
+                                             self.level.neighbors[direction][new_player], self.metrics):
+                continue
 
-                    # Calculate weight
-                    move_weight = 1
-                    if is_push:
-                        move_weight += current_state.get_weight(*new_pos)
+            # States already queued or in an expanded region are dropped before
+            # they cost a flood fill
+            compressed_new = self.encoder.pack(new_player, new_stones)
+            if compressed_new in self.visited or \
+                    self.closed_regions.get(compressed_new >> self.encoder.cell_bits, 0) >> new_player & 1:
+                continue
+            self.visited.add(compressed_new)
 
-                    self.queue.append((compressed_new, new_path, current_weight + move_weight))
+            # Walk to the stone, then push it
+            move_weight = reach[from_cell] + 1 + self.level.weights[pushed]
+            self.queue.append((compressed_new, self.nodes.add(node, direction, from_cell), current_weight + move_weight))
 
         return False
 
     def save_metrics(self, level_number):
-        self.metrics.save_to_file("BFS", level_number)
+        self.metrics.save_to_file(self.algorithm_name, level_number)
 
     def can_move(self, state, x, y, dx, dy):
         return self.character_move.can_move(state, x, y, dx, dy)
@@ -0,0 +1,213 @@
+from collections import deque
+from itertools import combinations
+from ..CharacterMove import CharacterMove
+from ..Level import Level
+from ..NodeTable import NodeTable
+from ..Pruners import DeadSquarePruner
+from ..AlgorithmMetrics import AlgorithmMetrics
+
+# Breadth-first search over pushes from the start and over pulls from every solved
+# arrangement at once, always growing the smaller frontier; the two searches meet
+# on a state with the same stones and the same player region
+class BidirectionalSolver:
+    # Label written to output-XX.txt
+    algorithm_name = "Bidirectional"
+
+    def __init__(self, initial_state, pruners=None):
+        self.initial_state = initial_state
+        self.solution = None
+        self.current_step = -1
+        self.operation_limit = 10**6
+        self.character_move = CharacterMove()
+        self.level = Level(initial_state)
+        self.encoder = self.level.encoder
+        # Only the forward search is pruned; pulled stones can always be pushed back
+        self.pruners = [DeadSquarePruner()] if pruners is None else pruners
+        self.dir_to_char = {
+            (0, 1): 'D', (1, 0): 'R',
+            (0, -1): 'U', (-1, 0): 'L'
+        }
+        self.char_to_dir = {
+            'D': (0, 1), 'U': (0, -1), 'L': (-1, 0), 'R': (1, 0),
+            'd': (0, 1), 'u': (0, -1), 'l': (-1, 0), 'r': (1, 0)
+        }
+
+        self.directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        self.metrics = AlgorithmMetrics()
+        self.reset_solver()
+
+    def reset_solver(self):
+        compressed_initial = self.compress_state(self.initial_state)
+        # Entries are (state, node); both tables record the pushes as
+        # (from_cell, direction), so the backward half replays forwards
+        self.forward = deque([(compressed_initial, 0)])
+        self.backward = deque()
+        # Goal states are generated one at a time as the backward search needs them:
+        # with k stones of distinct weights there are k! arrangements on the switches
+        self.goal_seeds = self.goal_keys()
+        self.next_seed = next(self.goal_seeds, None)
+        # Normalized key -> node of every expanded state, per direction
+        self.forward_closed = {}
+        self.backward_closed = {}
+        self.forward_nodes = NodeTable(with_cells=True)
+        self.backward_nodes = NodeTable(with_cells=True)
+        self.metrics = AlgorithmMetrics()
+        self.metrics.start_tracking()
+
+    # One start state per solved arrangement and player region next to a stone
+    def goal_keys(self):
+        level = self.level
+        for stones in self.goal_arrangements():
+            occupied = set(stones)
+            covered = set()
+            for cell in stones:
+                for step in level.neighbors:
+                    player = step[cell]
+                    if player < 0 or level.is_wall[player] or player in occupied or player in covered:
+                        continue
+                    reach = self.character_move.reachable(level, player, occupied)
+                    covered.update(reach)
+                    yield self.encoder.pack(min(reach), stones)
+
+    # Every way to put the stones on switches, as slot-ordered stone tuples;
+    # stones of equal weight are interchangeable, so each class picks a set of switches
+    def goal_arrangements(self):
+        classes = self.encoder.classes
+
+        def place(index, free):
+            if index == len(classes):
+                yield ()
+                return
+            start, end = classes[index]
+            for cells in combinations(free, end - start):
+                rest = [cell for cell in free if cell not in cells]
+                for tail in place(index + 1, rest):
+                    yield cells + tail
+
+        return place(0, self.level.switch_cells)
+
+    def compress_state(self, state):
+        return self.encoder.encode(state)
+
+    def decompress_state(self, compressed):
+        return self.encoder.decode(compressed)
+
+    # Backward states still to expand, counting the next unused goal state
+    def backward_size(self):
+        return len(self.backward) + (self.next_seed is not None)
+
+    # Either side running dry proves there is no solution, but the backward side
+    # only once the start state has been expanded: a level whose stones cannot be
+    # pulled at all has no goal states to seed it, and may be solved from the start
+    def exhausted(self):
+        return not self.forward or (not self.backward_size() and self.forward_closed)
+
+    def frontier_size(self):
+        if self.exhausted():
+            return 0
+        return len(self.forward) + self.backward_size()
+
+    def process_one_state(self):
+        if self.exhausted():
+            return False
+
+        if len(self.forward) <= self.backward_size() or not self.backward_size():
+            return self.process_forward_state()
+        return self.process_backward_state()
+
+    def process_forward_state(self):
+        compressed_current, node = self.forward.popleft()
+        player, stones = self.encoder.unpack(compressed_current)
+        occupied = set(stones)
+        reach = self.character_move.reachable(self.level, player, occupied)
+
+        # Normalize the player to the smallest reachable cell
+        compressed_canonical = self.encoder.pack(min(reach), stones)
+        if compressed_canonical in self.forward_closed:
+            return False
+        self.forward_closed[compressed_canonical] = node
+        self.metrics.nodes_explored += 1
+
+        # Update peak memory after processing each state
+        self.metrics.update_peak_memory()
+
+        if self.level.is_solved(stones):
+            return self.finish(self.forward_nodes.pushes(node))
+        if compressed_canonical in self.backward_closed:
+            return self.meet(node, self.backward_closed[compressed_canonical])
+
+        for direction, from_cell, new_stones, pushed in self.character_move.pushes(self.level, stones, occupied, reach):
+            new_player = self.level.neighbors[direction][from_cell]
+
+            # Skip pushes that leave the level unsolvable
+            if self.character_move.is_pruned(self.pruners, self.level, new_stones,
+                                             self.level.neighbors[direction][new_player], self.metrics):
+                continue
+
+            self.forward.append((self.encoder.pack(new_player, new_stones),
+                                 self.forward_nodes.add(node, direction, from_cell)))
+
+        return False
+
+    def process_backward_state(self):
+        # Goal states come first, so the backward search still grows layer by layer
+        if self.next_seed is not None:
+            compressed_current, node = self.next_seed, 0
+            self.next_seed = next(self.goal_seeds, None)
+        else:
+            compressed_current, node = self.backward.popleft()
+        player, stones = self.encoder.unpack(compressed_current)
+        occupied = set(stones)
+        reach = self.character_move.reachable(self.level, player, occupied)
+
+        compressed_canonical = self.encoder.pack(min(reach), stones)
+        if compressed_canonical in self.backward_closed:
+            return False
+        self.backward_closed[compressed_canonical] = node
+        self.metrics.nodes_explored += 1
+
+        # Update peak memory after processing each state
+        self.metrics.update_peak_memory()
+
+        if compressed_canonical in self.forward_closed:
+            return self.meet(self.forward_closed[compressed_canonical], node)
+
+        for direction, from_cell, new_stones, _ in self.character_move.pulls(self.level, stones, occupied, reach):
+            self.backward.append((self.encoder.pack(from_cell, new_stones),
+                                  self.backward_nodes.add(node, direction, from_cell)))
+
+        return False
+
+    # Pushes to the meeting state, then the backward half's pulls undone in reverse
+    def meet(self, forward_node, backward_node):
+        return self.finish(self.forward_nodes.pushes(forward_node) +
+                           self.backward_nodes.pushes(backward_node)[::-1])
+
+    def finish(self, pushes):
+        path, total_weight = self.character_move.expand_pushes(self.level, pushes)
+        self.solution = [self.char_to_dir[c] for c in path]
+        self.current_step = -1
+        self.metrics.stop_tracking()
+        self.metrics.total_steps = len(path)
+        self.metrics.total_weight = total_weight
+        self.metrics.solution_path = path
+        return True
+
+    def can_move(self, state, x, y, dx, dy):
+        return self.character_move.can_move(state, x, y, dx, dy)
+
+    def make_move(self, state, x, y, dx, dy):
+        return self.character_move.make_move(state, x, y, dx, dy)
+
+    def get_next_step(self):
+        if not self.solution:
+            return None
+
+        self.current_step += 1
+        if self.current_step >= len(self.solution):
+            return None
+
+        return self.solution[self.current_step]
+
+    def save_metrics(self, level_number):
+        self.metrics.save_to_file(self.algorithm_name, level_number)
@@ -0,0 +1,460 @@
+import multiprocessing
+import os
+import queue
+import time
+from heapq import heappop, heappush
+from ..CharacterMove import CharacterMove
+from ..Level import Level
+from ..Pruners import DeadSquarePruner
+from ..AlgorithmMetrics import AlgorithmMetrics
+
+INF = float('inf')
+
+# Worker that owns a state, from its Zobrist hash
+def owner_of(zobrist, num_workers):
+    return zobrist % num_workers
+
+def hda_star_worker(index, initial_state, push_mode, pruners, inboxes, results, report_interval):
+    HDAStarWorker(index, initial_state, push_mode, pruners, inboxes, results, report_interval).run()
+
+# One partition of the search: an A* open list over the states it owns, with
+# reopening, since a cheaper route to a state may arrive from another worker later
+class HDAStarWorker:
+    # Expansions between flushing generated children to their owners
+    batch_size = 32
+
+    def __init__(self, index, initial_state, push_mode, pruners, inboxes, results, report_interval):
+        self.index = index
+        self.push_mode = push_mode
+        self.inbox = inboxes[index]
+        self.inboxes = inboxes
+        self.results = results
+        self.report_interval = report_interval
+
+        self.level = Level(initial_state)
+        self.encoder = self.level.encoder
+        self.character_move = CharacterMove()
+        self.pruners = [DeadSquarePruner()] if pruners is None else pruners
+        self.metrics = AlgorithmMetrics()
+        self.metrics.start_tracking()
+
+        # Entries are (f, g, order, key, zobrist)
+        self.open = []
+        self.order = 0
+        self.best_g = {}
+        # key -> (parent key, move); step mode moves are direction characters,
+        # push mode moves are from_cell * 4 + direction
+        self.parents = {}
+        self.outboxes = [[] for _ in inboxes]
+        self.sent = 0
+        self.received = 0
+        self.incumbent = INF
+        self.reported = None
+
+    def run(self):
+        next_report = time.perf_counter() + self.report_interval
+        while True:
+            if self.open:
+                if not self.drain_inbox():
+                    return
+                for _ in range(self.batch_size):
+                    if not self.open:
+                        break
+                    self.expand()
+                self.flush()
+
+                if time.perf_counter() >= next_report:
+                    self.report()
+                    next_report = time.perf_counter() + self.report_interval
+            else:
+                # Idle until another worker or the coordinator sends something
+                if self.reported != (self.metrics.nodes_explored, 0):
+                    self.report()
+                if not self.handle(self.inbox.get()):
+                    return
+
+    # Handle everything already queued; False once told to stop
+    def drain_inbox(self):
+        while True:
+            try:
+                message = self.inbox.get_nowait()
+            except queue.Empty:
+                return True
+            if not self.handle(message):
+                return False
+
+    def handle(self, message):
+        kind = message[0]
+        if kind == "nodes":
+            self.received += 1
+            for entry in message[1]:
+                self.add(*entry)
+        elif kind == "incumbent":
+            self.incumbent = min(self.incumbent, message[1])
+        elif kind == "probe":
+            self.results.put(("probe", message[1], self.index, not self.open, self.sent, self.received))
+        elif kind == "trace":
+            parent, move = self.parents[message[1]]
+            self.results.put(("parent", message[1], parent, move))
+        elif kind == "stop":
+            self.report()
+            return False
+        return True
+
+    def add(self, g, h, key, zobrist, parent, move):
+        if g + h >= self.incumbent or g >= self.best_g.get(key, INF):
+            return
+        self.best_g[key] = g
+        self.parents[key] = (parent, move)
+        self.order += 1
+        heappush(self.open, (g + h, g, self.order, key, zobrist))
+
+    # Children travel with their Zobrist hash, so no process hashes a key twice
+    def send(self, g, h, key, zobrist, parent, move):
+        if g + h >= self.incumbent:
+            return
+        owner = owner_of(zobrist, len(self.inboxes))
+        if owner == self.index:
+            self.add(g, h, key, zobrist, parent, move)
+        else:
+            self.outboxes[owner].append((g, h, key, zobrist, parent, move))
+
+    def flush(self):
+        for owner, entries in enumerate(self.outboxes):
+            if entries:
+                self.inboxes[owner].put(("nodes", entries))
+                self.outboxes[owner] = []
+                self.sent += 1
+
+    def report(self):
+        self.metrics.update_peak_memory()
+        self.reported = (self.metrics.nodes_explored, len(self.open))
+        self.results.put(("progress", self.index, self.metrics.nodes_explored, len(self.open),
+                          self.open[0][0] if self.open else None,
+                          self.metrics.peak_memory - self.metrics.start_memory,
+                          self.metrics.pruned_children))
+
+    def expand(self):
+        f, g, _, key, zobrist = heappop(self.open)
+        if g > self.best_g[key]:
+            return
+        if f >= self.incumbent:
+            # Nothing left here can beat the best solution found so far
+            self.open = []
+            return
+
+        player, stones = self.encoder.unpack(key)
+        self.metrics.nodes_explored += 1
+
+        if self.level.is_solved(stones):
+            self.incumbent = g
+            self.results.put(("goal", g, key))
+            return
+
+        level = self.level
+        assignment = None
+        if self.push_mode:
+            occupied = set(stones)
+            reach = self.character_move.reachable(level, player, occupied)
+            for direction, from_cell, new_stones, pushed in self.character_move.pushes(level, stones, occupied, reach):
+                new_player = level.neighbors[direction][from_cell]
+                target = level.neighbors[direction][new_player]
+                if self.character_move.is_pruned(self.pruners, level, new_stones, target, self.metrics):
+                    continue
+
+                if assignment is None:
+                    assignment = level.assignment(stones)
+                h = level.repair_assignment(assignment, new_stones, pushed, target).total
+                new_g = g + reach[from_cell] + 1 + level.weights[pushed]
+                self.send(new_g, h, self.encoder.pack(new_player, new_stones),
+                          level.zobrist_move(zobrist, player, new_player, pushed, target), key,
+                          from_cell * 4 + direction)
+            return
+
+        for direction, new_player, new_stones, pushed in self.character_move.successors(level, player, stones):
+            dir_char = level.direction_chars[direction]
+            if pushed < 0:
+                # A walk keeps the parent's heuristic
+                self.send(g + 1, f - g, self.encoder.pack(new_player, new_stones),
+                          level.zobrist_move(zobrist, player, new_player), key, ord(dir_char.lower()))
+                continue
+
+            target = level.neighbors[direction][new_player]
+            if self.character_move.is_pruned(self.pruners, level, new_stones, target, self.metrics):
+                continue
+
+            if assignment is None:
+                assignment = level.assignment(stones)
+            h = level.repair_assignment(assignment, new_stones, pushed, target).total
+            self.send(g + 1 + level.weights[pushed], h, self.encoder.pack(new_player, new_stones),
+                      level.zobrist_move(zobrist, player, new_player, pushed, target), key, ord(dir_char))
+
+# Hash-distributed A*: every state is owned by one worker process, chosen by the
+# Zobrist hash of its state, and generated children are shipped to their owners.
+# This object is the coordinator; it tracks the best solution, detects
+# termination and rebuilds the path
+class HDAStarSolver:
+    # Label written to output-XX.txt
+    algorithm_name = "HDA*"
+
+    def __init__(self, initial_state, push_mode=False, pruners=None, workers=None):
+        self.initial_state = initial_state
+        # Expand whole stone pushes instead of single player steps; push-mode
+        # states keep the player's actual cell, so the cost stays optimal
+        self.push_mode = push_mode
+        self.pruners = pruners
+        self.num_workers = workers or os.cpu_count() or 1
+        self.solution = None
+        self.current_step = -1
+        self.operation_limit = 10**6
+        self.character_move = CharacterMove()
+        self.level = Level(initial_state)
+        self.encoder = self.level.encoder
+        self.dir_to_char = {
+            (0, 1): 'D', (1, 0): 'R',
+            (0, -1): 'U', (-1, 0): 'L'
+        }
+        self.char_to_dir = {
+            'D': (0, 1), 'U': (0, -1), 'L': (-1, 0), 'R': (1, 0),
+            'd': (0, 1), 'u': (0, -1), 'l': (-1, 0), 'r': (1, 0)
+        }
+
+        self.directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        # Seconds between worker progress reports and between termination probes
+        self.report_interval = 0.1
+        self.probe_interval = 0.01
+        self.processes = []
+        self.metrics = AlgorithmMetrics()
+        self.reset_solver()
+
+    def reset_solver(self):
+        self.stop_workers()
+        self.finished = False
+        self.search_done = False
+        # Why the search was abandoned, e.g. a worker process died; None otherwise
+        self.error = None
+        self.incumbent = INF
+        self.goal_key = None
+        self.last_f = None
+        # Latest (nodes, open size, min f, memory, pruned) report of every worker
+        self.worker_stats = {}
+        self.wave = 0
+        # Replies to the probe wave in flight, None between waves
+        self.wave_replies = None
+        self.last_wave_counts = None
+        self.next_probe = 0
+        self.metrics = AlgorithmMetrics()
+        self.metrics.start_tracking()
+
+    # Workers start on the first expansion, so a solver built only to replay a
+    # solution never spawns processes
+    def start_workers(self):
+        context = multiprocessing.get_context("spawn")
+        self.inboxes = [context.Queue() for _ in range(self.num_workers)]
+        self.results = context.Queue()
+        self.processes = [
+            context.Process(target=hda_star_worker,
+                            args=(index, self.initial_state, self.push_mode, self.pruners,
+                                  self.inboxes, self.results, self.report_interval),
+                            daemon=True)
+            for index in range(self.num_workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+        # Seed the owner of the initial state; the coordinator counts as a sender
+        initial_key = self.compress_state(self.initial_state)
+        initial_zobrist = self.level.zobrist(self.level.initial_player, self.level.initial_stones)
+        self.inboxes[owner_of(initial_zobrist, self.num_workers)].put(
+            ("nodes", [(0, 0, initial_key, initial_zobrist, None, None)]))
+        self.seeded = 1
+
+    def stop_workers(self):
+        if not self.processes:
+            return
+        for inbox in self.inboxes:
+            inbox.put(("stop",))
+        for process in self.processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        # Keep the final reports the workers sent on their way out
+        while True:
+            try:
+                self.handle(self.results.get_nowait())
+            except (queue.Empty, OSError, EOFError):
+                break
+
+        for channel in self.inboxes + [self.results]:
+            channel.cancel_join_thread()
+            channel.close()
+        self.processes = []
+
+    def compress_state(self, state):
+        return self.encoder.encode(state)
+
+    def decompress_state(self, compressed):
+        return self.encoder.decode(compressed)
+
+    # Open states the workers last reported; never 0 before termination is detected
+    def frontier_size(self):
+        if self.finished:
+            return 0
+        return max(1, sum(stats[1] for stats in self.worker_stats.values()))
+
+    def process_one_state(self):
+        if self.finished:
+            return False
+        if not self.processes:
+            self.start_workers()
+
+        try:
+            message = self.results.get(timeout=0.001)
+        except queue.Empty:
+            message = None
+
+        if message is not None:
+            self.handle(message)
+        elif self.check_workers():
+            return False
+
+        if self.metrics.nodes_explored >= self.operation_limit:
+            self.finish()
+            return False
+
+        if self.wave_replies is None and time.perf_counter() >= self.next_probe:
+            self.start_probe()
+
+        if self.search_done:
+            if self.goal_key is not None:
+                return self.build_solution()
+            self.finish()
+        return False
+
+    def handle(self, message):
+        kind = message[0]
+        if kind == "progress":
+            self.worker_stats[message[1]] = message[2:]
+            self.metrics.nodes_explored = sum(stats[0] for stats in self.worker_stats.values())
+            open_f = [stats[2] for stats in self.worker_stats.values() if stats[2] is not None]
+            self.last_f = min(open_f) if open_f else None
+        elif kind == "goal":
+            _, g, key = message
+            if g < self.incumbent:
+                self.incumbent = g
+                self.goal_key = key
+                for inbox in self.inboxes:
+                    inbox.put(("incumbent", g))
+        elif kind == "probe":
+            _, wave, index, idle, sent, received = message
+            if wave == self.wave and self.wave_replies is not None:
+                self.wave_replies[index] = (idle, sent, received)
+                if len(self.wave_replies) == self.num_workers:
+                    self.end_probe()
+
+    def start_probe(self):
+        self.wave += 1
+        self.wave_replies = {}
+        for inbox in self.inboxes:
+            inbox.put(("probe", self.wave))
+
+    # The search is over once two consecutive waves find every worker idle with
+    # unchanged counters and every sent batch received: a worker only becomes
+    # busy again by receiving, which would have changed its counters
+    def end_probe(self):
+        replies = self.wave_replies
+        self.wave_replies = None
+        self.next_probe = time.perf_counter() + self.probe_interval
+
+        if not all(idle for idle, _, _ in replies.values()):
+            self.last_wave_counts = None
+            return
+
+        counts = tuple(replies[index][1:] for index in range(self.num_workers))
+        sent = self.seeded + sum(sent for sent, _ in counts)
+        received = sum(received for _, received in counts)
+        if counts == self.last_wave_counts and sent == received:
+            self.search_done = True
+        self.last_wave_counts = counts
+
+    # Abandon the search when a worker process has died (an exception, or killed
+    # for memory): its states are lost and the probe waves would never complete
+    def check_workers(self):
+        for index, process in enumerate(self.processes):
+            if process.exitcode is not None:
+                self.error = f"worker {index} exited with code {process.exitcode}"
+                self.finish()
+                return True
+        return False
+
+    def finish(self):
+        self.finished = True
+        self.stop_workers()
+        self.metrics.stop_tracking()
+
+    # Follow parent keys from the goal back to the initial state, asking each
+    # key's owner for its parent
+    def build_solution(self):
+        moves = []
+        key = self.goal_key
+        while True:
+            zobrist = self.level.zobrist(*self.encoder.unpack(key))
+            self.inboxes[owner_of(zobrist, self.num_workers)].put(("trace", key))
+            while True:
+                try:
+                    message = self.results.get(timeout=0.1)
+                except queue.Empty:
+                    if self.check_workers():
+                        return False
+                    continue
+                if message[0] == "parent" and message[1] == key:
+                    break
+                self.handle(message)
+            _, _, parent, move = message
+            if parent is None:
+                break
+            moves.append(move)
+            key = parent
+        moves.reverse()
+
+        if self.push_mode:
+            path, total_weight = self.character_move.expand_pushes(
+                self.level, [(move >> 2, move & 3) for move in moves])
+        else:
+            path = "".join(chr(move) for move in moves)
+            total_weight = self.incumbent
+
+        self.finish()
+
+        self.solution = [self.char_to_dir[c] for c in path]
+        self.current_step = -1
+        self.metrics.total_steps = len(path)
+        self.metrics.total_weight = total_weight
+        self.metrics.solution_path = path
+        self.metrics.peak_memory = self.metrics.start_memory + sum(
+            stats[3] for stats in self.worker_stats.values())
+        for stats in self.worker_stats.values():
+            for rule, count in stats[4].items():
+                self.metrics.record_prune(rule, count)
+        return True
+
+    def can_move(self, state, x, y, dx, dy):
+        return self.character_move.can_move(state, x, y, dx, dy)
+
+    def make_move(self, state, x, y, dx, dy):
+        return self.character_move.make_move(state, x, y, dx, dy)
+
+    def get_next_step(self):
+        if not self.solution:
+            return None
+
+        self.current_step += 1
+        if self.current_step >= len(self.solution):
+            return None
+
+        return self.solution[self.current_step]
+
+    def save_metrics(self, level_number):
+        self.metrics.save_to_file(self.algorithm_name, level_number)
@@ -0,0 +1,158 @@
+from ..CharacterMove import CharacterMove
+from ..Level import Level
+from ..Pruners import DeadSquarePruner
+from ..AlgorithmMetrics import AlgorithmMetrics
+from ..TranspositionTable import TranspositionTable
+
+INF = float('inf')
+
+# Iterative-deepening A*: depth-first searches bounded by f = g + h, each bound
+# raised to the smallest f that exceeded the last one. Memory is the current
+# branch plus a fixed-size transposition table, instead of a visited set
+class IDAStarSolver:
+    # Label written to output-XX.txt
+    algorithm_name = "IDA*"
+
+    def __init__(self, initial_state, pruners=None, memory_mb=64):
+        self.initial_state = initial_state
+        # Transposition table budget in MB
+        self.memory_mb = memory_mb
+        self.solution = None
+        self.current_step = -1
+        self.operation_limit = 10**6
+        self.character_move = CharacterMove()
+        self.level = Level(initial_state)
+        self.encoder = self.level.encoder
+        self.pruners = [DeadSquarePruner()] if pruners is None else pruners
+        self.dir_to_char = {
+            (0, 1): 'D', (1, 0): 'R',
+            (0, -1): 'U', (-1, 0): 'L'
+        }
+        self.char_to_dir = {
+            'D': (0, 1), 'U': (0, -1), 'L': (-1, 0), 'R': (1, 0),
+            'd': (0, 1), 'u': (0, -1), 'l': (-1, 0), 'r': (1, 0)
+        }
+
+        self.directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        self.metrics = AlgorithmMetrics()
+        self.reset_solver()
+
+    def reset_solver(self):
+        self.initial_assignment = self.level.assignment(self.level.initial_stones)
+        self.threshold = self.initial_assignment.total
+        self.iterations = 0
+        self.last_f = None
+        self.metrics = AlgorithmMetrics()
+        self.metrics.start_tracking()
+        # Allocated up front, so the reported memory includes the whole budget
+        self.table = TranspositionTable(self.memory_mb)
+        self.start_iteration()
+
+    # Restart from the initial state with the current bound
+    def start_iteration(self):
+        self.iterations += 1
+        self.next_threshold = INF
+        self.table.new_search()
+        # Entries are (depth, state, zobrist, g, move, total_weight, assignment);
+        # path[d] is the move into the branch's state at depth d, '' for the root
+        initial_zobrist = self.level.zobrist(self.level.initial_player, self.level.initial_stones)
+        self.stack = [(0, self.compress_state(self.initial_state), initial_zobrist, 0, '', 0,
+                       self.initial_assignment)]
+        self.path = []
+
+    def compress_state(self, state):
+        return self.encoder.encode(state)
+
+    def decompress_state(self, compressed):
+        return self.encoder.decode(compressed)
+
+    # Pending states of this iteration; 0 once no bound can be raised any further
+    def frontier_size(self):
+        if not self.stack and self.next_threshold == INF:
+            return 0
+        return max(1, len(self.stack))
+
+    def process_one_state(self):
+        if not self.stack:
+            if self.next_threshold == INF:
+                return False
+            self.threshold = self.next_threshold
+            self.start_iteration()
+
+        depth, compressed_current, zobrist, g, move, total_weight, assignment = self.stack.pop()
+        del self.path[depth:]
+        self.path.append(move)
+
+        if self.table.visit(compressed_current, g, zobrist):
+            return False
+
+        player, stones = self.encoder.unpack(compressed_current)
+        self.last_f = g + assignment.total
+        self.metrics.nodes_explored += 1
+
+        # Update peak memory after processing each state
+        self.metrics.update_peak_memory()
+
+        if self.level.is_solved(stones):
+            path = "".join(self.path)
+            self.solution = [self.char_to_dir[c] for c in path]
+            self.current_step = -1
+            self.metrics.stop_tracking()
+            self.metrics.total_steps = len(path)
+            self.metrics.total_weight = total_weight
+            self.metrics.solution_path = path
+            return True
+
+        children = []
+        for direction, new_player, new_stones, pushed in self.character_move.successors(self.level, player, stones):
+            is_push = pushed >= 0
+            target = self.level.neighbors[direction][new_player]
+
+            # Skip pushes that leave the level unsolvable
+            if is_push and self.character_move.is_pruned(self.pruners, self.level, new_stones, target, self.metrics):
+                continue
+
+            move_weight = 1
+            new_assignment = assignment
+            if is_push:
+                move_weight += self.level.weights[pushed]
+                new_assignment = self.level.repair_assignment(assignment, new_stones, pushed, target)
+
+            # Children over the bound only set the next one
+            new_g = g + move_weight
+            new_f = new_g + new_assignment.total
+            if new_f > self.threshold:
+                self.next_threshold = min(self.next_threshold, new_f)
+                continue
+
+            dir_char = self.level.direction_chars[direction]
+            dir_char = dir_char if is_push else dir_char.lower()
+            new_zobrist = self.level.zobrist_move(zobrist, player, new_player, pushed, target)
+            children.append((new_f, depth + 1, self.encoder.pack(new_player, new_stones), new_zobrist, new_g,
+                             dir_char, total_weight + move_weight, new_assignment))
+
+        # Push the most promising child last so it is searched first
+        children.sort(key=lambda child: child[0], reverse=True)
+        for child in children:
+            self.stack.append(child[1:])
+
+        return False
+
+    def can_move(self, state, x, y, dx, dy):
+        return self.character_move.can_move(state, x, y, dx, dy)
+
+    def make_move(self, state, x, y, dx, dy):
+        return self.character_move.make_move(state, x, y, dx, dy)
+
+    def get_next_step(self):
+        if not self.solution:
+            return None
+
+        self.current_step += 1
+        if self.current_step >= len(self.solution):
+            return None
+
+        return self.solution[self.current_step]
+
+    def save_metrics(self, level_number):
+        self.metrics.save_to_file(self.algorithm_name, level_number)
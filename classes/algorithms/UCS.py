@@ -1,15 +1,30 @@
 from ..CharacterMove import CharacterMove
-from ..GameState import GameState
+from ..Level import Level
+from ..NodeTable import NodeTable
+from ..Pruners import DeadSquarePruner
 from ..AlgorithmMetrics import AlgorithmMetrics
+from ..BucketQueue import BucketQueue
+from functools import partial
 from heapq import heappop, heappush
 
 class UCSSolver:
-    def __init__(self, initial_state):
+    # Label written to output-XX.txt
+    algorithm_name = "UCS"
+
+    def __init__(self, initial_state, push_mode=False, pruners=None, queue_type="heap", tie_policy="fifo"):
         self.initial_state = initial_state
+        # Expand whole stone pushes instead of single player steps
+        self.push_mode = push_mode
+        # "heap" for heapq, "bucket" for a BucketQueue keyed by integer cost
+        self.queue_type = queue_type
+        self.tie_policy = tie_policy
         self.solution = None
         self.current_step = -1
         self.operation_limit = 10**6
         self.character_move = CharacterMove()
+        self.level = Level(initial_state)
+        self.encoder = self.level.encoder
+        self.pruners = [DeadSquarePruner()] if pruners is None else pruners
         self.dir_to_char = {
             (0, 1): 'D', (1, 0): 'R',
             (0, -1): 'U', (-1, 0): 'L'
@@ -26,41 +41,69 @@ class UCSSolver:
 
     def reset_solver(self):
         compressed_initial = self.compress_state(self.initial_state)
-        # Initialize with (cost, index, state, path, total_weight)
-        self.priority_queue = [(0, 0, compressed_initial, "", 0)]
-        self.visited = {compressed_initial}
+        # Initialize with (cost, index, state, node, total_weight)
+        self.create_queue()
+        self.queue_push((0, 0, compressed_initial, 0, 0))
+        # Cheapest known cost of every generated state; heap entries that are
+        # worse than it are stale and skipped when popped
+        self.best_cost = {compressed_initial: 0}
+        # Push mode keys best_cost on the raw state (the player where the push left
+        # it) and closes every expanded player region: the stone part of a key maps
+        # to the bitmask of the player cells already covered
+        self.closed_regions = {}
         self.index = 0
+        self.last_f = None
+        self.nodes = NodeTable(with_cells=self.push_mode)
         self.metrics = AlgorithmMetrics()
         self.metrics.start_tracking()
 
+    def create_queue(self):
+        if self.queue_type == "bucket":
+            self.priority_queue = BucketQueue(self.tie_policy)
+            self.queue_push = self.priority_queue.push
+            self.queue_pop = self.priority_queue.pop
+        elif self.queue_type == "heap":
+            self.priority_queue = []
+            self.queue_push = partial(heappush, self.priority_queue)
+            self.queue_pop = partial(heappop, self.priority_queue)
+        else:
+            raise ValueError(f"Unknown queue type: {self.queue_type}")
+
     def compress_state(self, state):
-        stones = tuple(sorted((pos, weight) for pos, weight in state.stones.items()))
-        return (state.player_pos, stones)
+        return self.encoder.encode(state)
 
     def decompress_state(self, compressed):
-        player_pos, stones = compressed
-        new_state = GameState()
-        new_state.width = self.initial_state.width
-        new_state.height = self.initial_state.height
-        new_state.walls = self.initial_state.walls
-        new_state.switches = self.initial_state.switches
-        new_state.player_pos = player_pos
-        new_state.stones = dict(stones)
-        new_state.player_on_switch = player_pos in new_state.switches
-        return new_state
+        return self.encoder.decode(compressed)
+
+    def frontier_size(self):
+        return len(self.priority_queue)
 
     def process_one_state(self):
         if not self.priority_queue:
             return False
 
-        cost, _, compressed_current, path, total_weight = heappop(self.priority_queue)
-        current_state = self.decompress_state(compressed_current)
+        if self.push_mode:
+            return self.process_push_state()
+
+        profiler = self.metrics.profiler
+        profiler.start()
+        cost, _, compressed_current, node, total_weight = self.queue_pop()
+        self.last_f = cost
+        if cost > self.best_cost[compressed_current]:
+            profiler.lap("pop")
+            return False
+        profiler.lap("pop")
+
+        player, stones = self.encoder.unpack(compressed_current)
+        profiler.lap("decompress")
         self.metrics.nodes_explored += 1
+        profiler.node(len(self.priority_queue), len(self.best_cost))
 
         # Update peak memory after processing each state
         self.metrics.update_peak_memory()
 
-        if current_state.is_solved():
+        if self.level.is_solved(stones):
+            path = self.nodes.path(node)
             self.solution = [self.char_to_dir[c] for c in path]
             self.current_step = -1
             self.metrics.stop_tracking()
@@ -68,32 +111,96 @@ class UCSSolver:
             self.metrics.total_weight = total_weight
             self.metrics.solution_path = path
             return True
+        profiler.lap("is_solved")
+
+        for direction, new_player, new_stones, pushed in self.character_move.successors(self.level, player, stones):
+            # Skip pushes that leave the level unsolvable
+            if pushed >= 0 and self.character_move.is_pruned(self.pruners, self.level, new_stones,
+                                                             self.level.neighbors[direction][new_player], self.metrics):
+                profiler.lap("moves")
+                continue
+            profiler.lap("moves")
+
+            compressed_new = self.encoder.pack(new_player, new_stones)
+
+            # Determine if this move is a push
+            is_push = pushed >= 0
+
+            # Calculate weight
+            move_weight = 1
+            if is_push:
+                move_weight += self.level.weights[pushed]
+
+            # Only queue the state again when this route is strictly cheaper
+            new_total_weight = total_weight + move_weight
+            improved = new_total_weight < self.best_cost.get(compressed_new, new_total_weight + 1)
+            profiler.lap("hash")
+            if improved:
+                self.best_cost[compressed_new] = new_total_weight
+
+                # Get the direction character
+                dir_char = self.dir_to_char[self.directions[direction]]
+                dir_char = dir_char.upper() if is_push else dir_char.lower()
+                new_node = self.nodes.add(node, ord(dir_char))
+
+                self.index += 1
+                profiler.lap("moves")
+                self.queue_push((new_total_weight, self.index, compressed_new, new_node, new_total_weight))
+                profiler.lap("push")
+
+        profiler.lap("moves")
+        return False
 
-        x, y = current_state.player_pos
-        for dx, dy in self.directions:
-            if self.character_move.can_move(current_state, x, y, dx, dy):
-                new_state = self.character_move.make_move(current_state, x, y, dx, dy)
-                compressed_new = self.compress_state(new_state)
-
-                if compressed_new not in self.visited:
-                    self.visited.add(compressed_new)
-
-                    # Determine if this move is a push
-                    new_pos = (x + dx, y + dy)
-                    is_push = new_pos in current_state.stones
+    def process_push_state(self):
+        cost, _, compressed_current, node, total_weight = self.queue_pop()
+        self.last_f = cost
+        if cost > self.best_cost[compressed_current]:
+            return False
+        player, stones = self.encoder.unpack(compressed_current)
+        stones_key = compressed_current >> self.encoder.cell_bits
+        closed = self.closed_regions.get(stones_key, 0)
+        if closed >> player & 1:
+            return False
+        occupied = set(stones)
+        reach = self.character_move.reachable(self.level, player, occupied)
+        self.closed_regions[stones_key] = closed | self.character_move.region_mask(reach)
+        self.metrics.nodes_explored += 1
 
-                    # Get the direction character
-                    dir_char = self.dir_to_char[(dx, dy)]
-                    dir_char = dir_char.upper() if is_push else dir_char.lower()
-                    new_path = path + dir_char
+        # Update peak memory after processing each state
+        self.metrics.update_peak_memory()
 
-                    # Calculate weight
-                    move_weight = 1
-                    if is_push:
-                        move_weight += current_state.get_weight(*new_pos)
+        if self.level.is_solved(stones):
+            path, total_weight = self.character_move.expand_pushes(self.level, self.nodes.pushes(node))
+            self.solution = [self.char_to_dir[c] for c in path]
+            self.current_step = -1
+            self.metrics.stop_tracking()
+            self.metrics.total_steps = len(path)
+            self.metrics.total_weight = total_weight
+            self.metrics.solution_path = path
+            return True
 
-                    new_total_weight = total_weight + move_weight
-                    heappush(self.priority_queue, (new_total_weight, self.index, compressed_new, new_path, new_total_weight))
+        for direction, from_cell, new_stones, pushed in self.character_move.pushes(self.level, stones, occupied, reach):
+            new_player = self.level.neighbors[direction][from_cell]
+
+            # Skip pushes that leave the level unsolvable
+            if self.character_move.is_pruned(self.pruners, self.level, new_stones,
+                                             self.level.neighbors[direction][new_player], self.metrics):
+                continue
+
+            # Walk to the stone, then push it
+            move_weight = reach[from_cell] + 1 + self.level.weights[pushed]
+            compressed_new = self.encoder.pack(new_player, new_stones)
+            new_total_weight = total_weight + move_weight
+
+            # Routes that are no cheaper, or into an expanded region, are dropped
+            # before they cost a flood fill
+            if new_total_weight >= self.best_cost.get(compressed_new, new_total_weight + 1) or \
+                    self.closed_regions.get(compressed_new >> self.encoder.cell_bits, 0) >> new_player & 1:
+                continue
+            self.best_cost[compressed_new] = new_total_weight
+            self.index += 1
+            self.queue_push((new_total_weight, self.index, compressed_new,
+                             self.nodes.add(node, direction, from_cell), new_total_weight))
 
         return False
 
@@ -114,4 +221,4 @@ class UCSSolver:
         return self.solution[self.current_step]
 
     def save_metrics(self, level_number):
-        self.metrics.save_to_file("UCS", level_number)
+        self.metrics.save_to_file(self.algorithm_name, level_number)
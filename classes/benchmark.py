@@ -0,0 +1,192 @@
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import timeit
+from .GameState import GameState
+from .CharacterMove import CharacterMove
+from .SolverRunner import SolverRunner
+from .BatchRunner import BatchRunner
+from .algorithms.A_Star import AStarSolver
+from .solve import level_files, level_number, add_solver_arguments, check_solver_arguments, solver_options
+
+# Benchmark harness: python -m classes.benchmark [levels] [options]
+# Runs every solver on every level several times in fresh processes, times the
+# hot helpers on their own, and compares both against a stored baseline
+
+def percentile(values, fraction):
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+# {"level-algorithm": stats} over runs of the batch runner; each job runs in a
+# fresh process, so memory numbers do not depend on earlier runs
+def solver_benchmarks(files, algorithms, runs, operation_limit, time_limit, options):
+    samples = {}
+    for _ in range(runs):
+        results = BatchRunner(1, operation_limit, time_limit, None, options).run(files, algorithms)
+        for (filename, algorithm), result in results.items():
+            samples.setdefault((filename, algorithm), []).append(result)
+
+    stats = {}
+    for (filename, algorithm), results in samples.items():
+        solved = [metrics for status, metrics in results if status == "solved"]
+        name = f"{level_number(filename):02d}-{algorithm}"
+        if len(solved) < len(results):
+            stats[name] = {"status": next(status for status, _ in results if status != "solved")}
+            continue
+
+        times = [metrics.get_execution_time_ms() for metrics in solved]
+        median_ms = statistics.median(times)
+        nodes = solved[0].nodes_explored
+        stats[name] = {
+            "status": "solved",
+            "median_ms": round(median_ms, 3),
+            "p95_ms": round(percentile(times, 0.95), 3),
+            "nodes": nodes,
+            "nodes_per_sec": round(nodes / (median_ms / 1000)) if median_ms > 0 else None,
+            "memory_mb": round(max(metrics.get_memory_usage_mb() for metrics in solved), 3)
+        }
+    return stats
+
+# Best time per call in microseconds of each hot helper, on one level; the
+# heuristic cases time the incremental assignment that A* runs per push
+def micro_benchmarks(filename, repeat=5):
+    state = GameState.from_file(filename)
+    solver = AStarSolver(state)
+    level = solver.level
+    character_move = CharacterMove()
+    x, y = state.player_pos
+    dx, dy = next((direction for direction in solver.directions
+                   if character_move.can_move(state, x, y, *direction)), (0, 0))
+
+    stones = level.initial_stones
+    assignment = level.assignment(stones)
+    occupied = set(stones)
+    reach = character_move.reachable(level, level.initial_player, occupied)
+    push = next(iter(character_move.pushes(level, stones, occupied, reach)), None)
+
+    cases = {
+        "make_move": lambda: character_move.make_move(state, x, y, dx, dy),
+        "compress_state": lambda: solver.compress_state(state),
+        "cost_rows": lambda: level.cost_rows(stones),
+        "successors": lambda: list(character_move.successors(level, level.initial_player, stones))
+    }
+    if push is not None:
+        direction, from_cell, new_stones, pushed = push
+        target = level.neighbors[direction][level.neighbors[direction][from_cell]]
+        cases["repair_assignment"] = lambda: level.repair_assignment(assignment, new_stones, pushed, target)
+
+    stats = {}
+    for name, case in cases.items():
+        timer = timeit.Timer(case)
+        number, _ = timer.autorange()
+        stats[name] = round(min(timer.repeat(repeat, number)) / number * 1000000, 3)
+    return stats
+
+# Lines describing every measurement that got slower than baseline by more than
+# threshold (a fraction), or stopped solving; solver timings under min_ms are too
+# noisy, and micro timings only count once they are also min_us slower
+def find_regressions(results, baseline, threshold, min_ms, min_us):
+    regressions = []
+    for name, old in baseline.get("solvers", {}).items():
+        new = results["solvers"].get(name)
+        if new is None:
+            continue
+        if old["status"] == "solved" and new["status"] != "solved":
+            regressions.append(f"{name}: {new['status']} (was solved)")
+        elif new["status"] == "solved" and old["status"] == "solved" and old["median_ms"] >= min_ms \
+                and new["median_ms"] > old["median_ms"] * (1 + threshold):
+            regressions.append(f"{name}: median {new['median_ms']:.2f} ms (was {old['median_ms']:.2f} ms)")
+
+    # Micro-benchmarks are only comparable on the same level
+    if baseline.get("micro_level") != results.get("micro_level"):
+        return regressions
+    for name, old in baseline.get("micro", {}).items():
+        new = results["micro"].get(name)
+        if new is not None and new > old * (1 + threshold) and new - old > min_us:
+            regressions.append(f"{name}: {new:.3f} us per call (was {old:.3f} us)")
+    return regressions
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m classes.benchmark",
+                                     description="Benchmark the solvers and compare against a baseline.")
+    parser.add_argument("levels", nargs="*",
+                        help="level numbers or input-XX.txt paths (default: every input-XX.txt in --input-dir)")
+    parser.add_argument("-a", "--algorithms", nargs="+", choices=list(SolverRunner.algorithms),
+                        default=["bfs", "dfs", "ucs", "a_star", "ida_star"], help="solvers to benchmark")
+    parser.add_argument("--input-dir", default=".", help="directory holding input-XX.txt files")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="runs of every (level, solver) pair")
+    parser.add_argument("--limit", type=int, default=None, help="operation limit per solve (default: the solver's own)")
+    parser.add_argument("--timeout", type=float, default=60, help="time limit per solve in seconds")
+    parser.add_argument("--micro-level", default=None,
+                        help="level for the micro-benchmarks (default: the first benchmarked level)")
+    parser.add_argument("--no-solvers", action="store_true", help="only run the micro-benchmarks")
+    parser.add_argument("--no-micro", action="store_true", help="skip the micro-benchmarks")
+    add_solver_arguments(parser)
+    parser.add_argument("--baseline", default=None, help="baseline JSON to compare against")
+    parser.add_argument("--save", default=None, metavar="FILE", help="write the results as a baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="fail when a median gets slower than the baseline by more than this fraction")
+    parser.add_argument("--min-ms", type=float, default=5.0,
+                        help="ignore solver timings whose baseline median is below this many ms")
+    parser.add_argument("--min-us", type=float, default=1.0,
+                        help="ignore micro timings less than this many us slower than the baseline")
+    args = parser.parse_args(argv)
+    check_solver_arguments(parser, args)
+    return args
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    files = level_files(args.levels, args.input_dir) if args.levels else sorted(
+        os.path.join(args.input_dir, name) for name in os.listdir(args.input_dir)
+        if re.fullmatch(r"input-\d+\.txt", name))
+
+    results = {"solvers": {}, "micro": {}}
+    if not args.no_solvers:
+        results["solvers"] = solver_benchmarks(files, args.algorithms, args.runs, args.limit, args.timeout,
+                                                solver_options(args))
+        # Generated levels carry their parameters, for scaling curves
+        manifest_filename = os.path.join(args.input_dir, "levels.json")
+        if os.path.exists(manifest_filename):
+            with open(manifest_filename) as f:
+                manifest = json.load(f)
+            for name, stats in results["solvers"].items():
+                params = manifest.get(name.split("-")[0])
+                if params is not None:
+                    stats["params"] = params
+        for name, stats in results["solvers"].items():
+            if stats["status"] == "solved":
+                print(f"{name}: median {stats['median_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms, "
+                      f"{stats['nodes']} nodes, {stats['nodes_per_sec']} nodes/s, {stats['memory_mb']:.2f} MB")
+            else:
+                print(f"{name}: {stats['status']}")
+
+    if not args.no_micro:
+        micro_file = level_files([args.micro_level], args.input_dir)[0] if args.micro_level else files[0]
+        results["micro_level"] = level_number(micro_file)
+        results["micro"] = micro_benchmarks(micro_file)
+        for name, us in results["micro"].items():
+            print(f"{name}: {us:.3f} us per call")
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold, args.min_ms, args.min_us)
+        for line in regressions:
+            print(f"Regression: {line}")
+        if regressions:
+            return 1
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
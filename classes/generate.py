@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import sys
+from .LevelGenerator import LevelGenerator
+
+# Level generator: python -m classes.generate [options]
+# Writes input-XX.txt files for every (size, stone count) pair plus a levels.json
+# manifest of the parameters, so benchmark results can be plotted against them
+
+def size(text):
+    width, _, height = text.partition("x")
+    try:
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Sizes look like 8x6, not {text}")
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m classes.generate",
+                                     description="Generate solvable levels for scaling benchmarks.")
+    parser.add_argument("--sizes", nargs="+", type=size, default=[(7, 7)],
+                        help="map sizes as WIDTHxHEIGHT, walls included (default: 7x7)")
+    parser.add_argument("--stones", nargs="+", type=int, default=[2], help="stone counts (default: 2)")
+    parser.add_argument("--weights", nargs=2, type=int, default=[1, 99], metavar=("MIN", "MAX"),
+                        help="stone weight range (default: 1 99)")
+    parser.add_argument("--walls", type=float, default=0.15, help="share of inner cells that are walls")
+    parser.add_argument("--pulls", type=int, default=None,
+                        help="random pulls away from the solved arrangement (default: 10 per stone)")
+    parser.add_argument("--count", type=int, default=1, help="levels per (size, stone count) pair")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first level; later levels count up")
+    parser.add_argument("--out", default="generated", help="directory to write the levels to")
+    parser.add_argument("--start", type=int, default=1, help="number of the first input-XX.txt file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    os.makedirs(args.out, exist_ok=True)
+
+    manifest = {}
+    number = args.start
+    seed = args.seed
+    for width, height in args.sizes:
+        for stones in args.stones:
+            for _ in range(args.count):
+                generator = LevelGenerator(width, height, stones, tuple(args.weights), args.walls, args.pulls, seed)
+                try:
+                    weights, rows = generator.generate()
+                except ValueError as error:
+                    print(error)
+                    seed += 1
+                    continue
+
+                filename = os.path.join(args.out, f"input-{number:02d}.txt")
+                LevelGenerator.write(filename, weights, rows)
+                manifest[f"{number:02d}"] = {"width": width, "height": height, "stones": stones,
+                                             "weights": args.weights, "walls": args.walls,
+                                             "pulls": generator.pulls, "seed": seed}
+                print(f"{filename}: {width}x{height}, stones: {stones}, seed: {seed}")
+                number += 1
+                seed += 1
+
+    with open(os.path.join(args.out, "levels.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import argparse
+import os
+import re
+import sys
+from .GameState import GameState
+from .Pruners import PRUNERS
+from .VisitedStore import VISITED_STORES
+from .AlgorithmMetrics import MEMORY_SAMPLING
+from .StateEncoder import KEY_LAYOUTS
+from .SolverRunner import SolverRunner
+from .BatchRunner import BatchRunner
+from .ResultsWriter import ResultsWriter
+
+# Headless batch solver: python -m classes.solve [levels] [options]
+
+def level_files(levels, input_dir):
+    files = []
+    for level in levels:
+        if level.isdigit():
+            files.append(os.path.join(input_dir, f"input-{int(level):02d}.txt"))
+        else:
+            files.append(level)
+    return files
+
+def level_number(filename):
+    match = re.search(r"input-(\d+)\.txt$", os.path.basename(filename))
+    if not match:
+        raise ValueError(f"Cannot read a level number from {filename}")
+    return int(match.group(1))
+
+# Options passed on to the solvers, shared with the benchmark harness
+def add_solver_arguments(parser):
+    parser.add_argument("--push-mode", action="store_true", help="expand stone pushes instead of single steps")
+    parser.add_argument("--pruners", nargs="*", choices=list(PRUNERS), default=None,
+                        help="pruning rules to enable (default: dead_square)")
+    parser.add_argument("--queue", choices=["heap", "bucket"], default="heap", help="UCS and A* frontier type")
+    parser.add_argument("--visited", choices=list(VISITED_STORES), default="memory",
+                        help="bfs and dfs visited set: Python set, compact hash table or disk-backed table")
+    parser.add_argument("--key-layout", choices=list(KEY_LAYOUTS), default="slots",
+                        help="bfs and dfs state keys: a cell per stone, or a cell bitset per stone weight")
+    parser.add_argument("--weight", type=float, default=1.0,
+                        help="a_star ranks states by g + weight * h; above 1 trades optimality for speed")
+    parser.add_argument("--anytime", action="store_true",
+                        help="a_star keeps improving its solution, lowering the weight to 1 until --timeout")
+    parser.add_argument("--ida-memory", type=int, default=64,
+                        help="ida_star transposition table budget in MB")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="search processes for hda_star (default: one per CPU)")
+    parser.add_argument("--memory-sampling", choices=list(MEMORY_SAMPLING), default="nodes",
+                        help="peak memory source: RSS every N nodes or every N ms, tracemalloc, or getrusage")
+    parser.add_argument("--sample-every", type=int, default=None,
+                        help="nodes or milliseconds between RSS samples (default: 256 nodes, 10 ms)")
+    parser.add_argument("--profile", type=int, default=0, metavar="K",
+                        help="time bfs, dfs, ucs and a_star per phase and sample their frontier every K nodes "
+                             "into profile-XX.json (default: off)")
+
+def check_solver_arguments(parser, args):
+    if args.anytime and args.push_mode:
+        parser.error("--anytime runs in step mode and cannot be combined with --push-mode")
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m classes.solve",
+                                     description="Solve levels without the GUI and write output-XX.txt files.")
+    parser.add_argument("levels", nargs="*",
+                        help="level numbers or input-XX.txt paths (default: every input-XX.txt in --input-dir)")
+    parser.add_argument("-a", "--algorithms", nargs="+", choices=list(SolverRunner.algorithms),
+                        default=["bfs", "dfs", "ucs", "a_star", "ida_star"],
+                        help="solvers to run, in output order (default: the GUI's solvers)")
+    parser.add_argument("--input-dir", default=".", help="directory holding input-XX.txt files")
+    parser.add_argument("--fresh", action="store_true", help="replace existing output-XX.txt files instead of appending")
+    parser.add_argument("--limit", type=int, default=None, help="operation limit per solve (default: the solver's own)")
+    parser.add_argument("--timeout", type=float, default=None, help="time limit per solve in seconds")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="solve (level, algorithm) pairs in this many worker processes")
+    parser.add_argument("--memory-limit", type=int, default=None,
+                        help="memory cap per job in MB (worker processes only)")
+    add_solver_arguments(parser)
+    parser.add_argument("--results", default=None, metavar="FILE",
+                        help="also append one JSON Lines record per solve to FILE")
+    args = parser.parse_args(argv)
+    check_solver_arguments(parser, args)
+    return args
+
+def solver_options(args):
+    options = {"push_mode": args.push_mode, "queue_type": args.queue, "workers": args.workers,
+               "memory_mb": args.ida_memory, "weight": args.weight, "anytime": args.anytime,
+               "visited_store": args.visited, "key_layout": args.key_layout,
+               "memory_sampling": (args.memory_sampling, args.sample_every), "profile": args.profile}
+    if args.pruners is not None:
+        options["pruners"] = [PRUNERS[name]() for name in args.pruners]
+    return options
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    files = level_files(args.levels, args.input_dir) if args.levels else sorted(
+        os.path.join(args.input_dir, name) for name in os.listdir(args.input_dir)
+        if re.fullmatch(r"input-\d+\.txt", name))
+
+    numbers = {filename: level_number(filename) for filename in files}
+    options = solver_options(args)
+
+    if args.jobs > 1 or args.memory_limit is not None:
+        runner = BatchRunner(args.jobs, args.limit, args.timeout, args.memory_limit, options)
+        results = runner.run(files, args.algorithms)
+        BatchRunner.write_outputs(results, files, args.algorithms, numbers, args.fresh)
+    else:
+        results = {}
+        for filename in files:
+            output_filename = f"output-{numbers[filename]:02d}.txt"
+            if args.fresh and os.path.exists(output_filename):
+                os.remove(output_filename)
+
+            state = GameState.from_file(filename)
+            for algorithm in args.algorithms:
+                solver = SolverRunner.create_solver(algorithm, state, **options)
+                status = SolverRunner.solve(solver, args.limit, args.timeout)
+                if status == "solved":
+                    solver.save_metrics(numbers[filename])
+                results[(filename, algorithm)] = (status, solver.metrics)
+
+    failures = 0
+    for filename in files:
+        for algorithm in args.algorithms:
+            status, metrics = results[(filename, algorithm)]
+            label = f"Level {numbers[filename]:02d} {algorithm}"
+            if status == "solved":
+                bound = "" if metrics.suboptimality_bound is None else f", Bound: {metrics.suboptimality_bound:.3f}"
+                print(f"{label}: Steps: {metrics.total_steps}, Weight: {metrics.total_weight}, "
+                      f"Nodes: {metrics.nodes_explored}, Time (ms): {metrics.get_execution_time_ms():.2f}{bound}")
+            else:
+                failures += 1
+                print(f"{label}: no solution found ({status})")
+
+    if args.results is not None:
+        with ResultsWriter(args.results) as writer:
+            for filename in files:
+                for algorithm in args.algorithms:
+                    status, metrics = results[(filename, algorithm)]
+                    writer.add(ResultsWriter.solve_record(numbers[filename], algorithm, status, metrics,
+                                                          SolverRunner.solver_config(algorithm, options)))
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import random
+from scipy.optimize import linear_sum_assignment
+from classes.Assignment import Assignment
+from classes.CharacterMove import CharacterMove
+from classes.GameState import GameState
+from classes.SolverRunner import SolverRunner
+from classes.algorithms.A_Star import AStarSolver
+
+
+def test_solve_matches_scipy():
+    rng = random.Random(1)
+    for size in range(1, 7):
+        cost = [[rng.randint(0, 50) for _ in range(size)] for _ in range(size)]
+        rows, cols = linear_sum_assignment(cost)
+        assert Assignment.solve(cost).total == sum(cost[r][c] for r, c in zip(rows, cols))
+
+
+# More stones than switches: the heuristic must not crash, and the level is unsolvable
+def test_more_stones_than_switches():
+    state = GameState.from_rows([1, 1], ["#######", "#@$ $.#", "#######"])
+    for algorithm in ("ucs", "a_star", "ida_star"):
+        solver = SolverRunner.create_solver(algorithm, state)
+        assert SolverRunner.solve(solver) == "unsolved"
+
+
+# Repairing the parent's assignment after a push gives the same heuristic as a full solve
+def test_repair_matches_full_solve():
+    rng = random.Random(2)
+    character_move = CharacterMove()
+    for number in (1, 4, 6, 11):
+        state = GameState.from_file(f"input-{number:02d}.txt")
+        solver = AStarSolver(state)
+        level = solver.level
+        player, stones = level.initial_player, level.initial_stones
+        assignment = level.assignment(stones)
+        pushes = 0
+        for _ in range(500):
+            moves = list(character_move.successors(level, player, stones))
+            if not moves:
+                break
+            direction, player, new_stones, pushed = rng.choice(moves)
+            if pushed >= 0:
+                target = level.neighbors[direction][player]
+                assignment = level.repair_assignment(assignment, new_stones, pushed, target)
+                assert assignment.total == level.assignment(new_stones).total
+                assert assignment.total == solver.heuristic_cells(new_stones)
+                pushes += 1
+            stones = new_stones
+        assert pushes
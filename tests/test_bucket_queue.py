@@ -0,0 +1,21 @@
+import random
+from classes.BucketQueue import BucketQueue
+
+
+def test_pops_in_priority_order():
+    rng = random.Random(3)
+    entries = [(rng.randint(0, 20), index) for index in range(200)]
+    for tie_policy in ("fifo", "lifo"):
+        queue = BucketQueue(tie_policy)
+        for entry in entries:
+            queue.push(entry)
+        assert len(queue) == len(entries)
+        assert sorted(queue) == sorted(entries)
+
+        popped = [queue.pop() for _ in entries]
+        assert not queue
+        assert [priority for priority, _ in popped] == sorted(priority for priority, _ in entries)
+        # Equal priorities come out in insertion order, or reversed for lifo
+        for priority in set(priority for priority, _ in entries):
+            order = [index for p, index in popped if p == priority]
+            assert order == sorted(order, reverse=tie_policy == "lifo")
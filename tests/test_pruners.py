@@ -0,0 +1,54 @@
+from classes.CharacterMove import CharacterMove
+from classes.GameState import GameState
+from classes.Level import Level
+from classes.Pruners import PRUNERS
+from classes.SolverRunner import SolverRunner
+
+
+# Every (stones, moved_cell) pushed along a solution path
+def solution_pushes(level, path):
+    character_move = CharacterMove()
+    player, stones = level.initial_player, level.initial_stones
+    for c in path:
+        direction = Level.direction_chars.index(c.upper())
+        for move_direction, new_player, new_stones, pushed in character_move.successors(level, player, stones):
+            if move_direction == direction:
+                break
+        if pushed >= 0:
+            yield new_stones, level.neighbors[direction][new_player]
+        player, stones = new_player, new_stones
+
+
+# No rule may reject a state an optimal solution passes through
+def test_pruners_keep_solution_paths():
+    for number in (1, 2, 3, 4):
+        state = GameState.from_file(f"input-{number:02d}.txt")
+        solver = SolverRunner.create_solver("a_star", state)
+        assert SolverRunner.solve(solver) == "solved"
+        level = Level(state)
+        for stones, moved_cell in solution_pushes(level, solver.metrics.solution_path):
+            for pruner_class in PRUNERS.values():
+                assert not pruner_class().is_deadlocked(level, stones, moved_cell)
+
+
+def test_pruners_keep_optimal_cost():
+    pruners = [pruner_class() for pruner_class in PRUNERS.values()]
+    for number in (1, 2, 3, 4):
+        state = GameState.from_file(f"input-{number:02d}.txt")
+        plain = SolverRunner.create_solver("a_star", state)
+        pruned = SolverRunner.create_solver("a_star", state, pruners=pruners)
+        assert SolverRunner.solve(plain) == SolverRunner.solve(pruned) == "solved"
+        assert pruned.metrics.total_weight == plain.metrics.total_weight
+
+
+def test_pruners_reject_deadlocks():
+    # Two stones side by side against the top wall form a 2x2 block
+    level = Level(GameState.from_rows([1, 1], ["######", "# $$ #", "#@ ..#", "######"]))
+    stones = level.initial_stones
+    moved_cell = level.encoder.cell_index((3, 1))
+    assert PRUNERS["block_2x2"]().is_deadlocked(level, stones, moved_cell)
+    assert PRUNERS["freeze"]().is_deadlocked(level, stones, moved_cell)
+
+    # Two stones on a closed wall segment without switches
+    level = Level(GameState.from_rows([1, 1], ["#######", "# $ $ #", "#  @  #", "#.   .#", "#######"]))
+    assert PRUNERS["wall_line"]().is_deadlocked(level, level.initial_stones, level.encoder.cell_index((4, 1)))
@@ -0,0 +1,76 @@
+from classes.GameState import GameState
+from classes.SolverRunner import SolverRunner
+
+
+# A level that starts solved has no goal states to seed the backward search with
+def test_solved_start():
+    for rows, weights in ((["#####", "#@  #", "#####"], []), (["#####", "#@ *#", "#####"], [1])):
+        state = GameState.from_rows(weights, rows)
+        for algorithm in ("bfs", "ucs", "a_star", "bidirectional"):
+            solver = SolverRunner.create_solver(algorithm, state)
+            assert SolverRunner.solve(solver) == "solved"
+            assert solver.metrics.total_steps == 0
+
+
+# Cheapest solution weight of some bundled levels
+OPTIMAL_WEIGHTS = {1: 429, 2: 8, 3: 78}
+
+
+def solve_level(number, algorithm, **options):
+    solver = SolverRunner.create_solver(algorithm, GameState.from_file(f"input-{number:02d}.txt"), **options)
+    assert SolverRunner.solve(solver) == "solved"
+    return solver.metrics
+
+
+def test_ucs_is_weight_optimal():
+    for number, weight in OPTIMAL_WEIGHTS.items():
+        assert solve_level(number, "ucs").total_weight == weight
+        assert solve_level(number, "a_star").total_weight == weight
+
+
+def test_bucket_queue_is_weight_optimal():
+    for number, weight in OPTIMAL_WEIGHTS.items():
+        for algorithm in ("ucs", "a_star"):
+            for tie_policy in ("fifo", "lifo"):
+                metrics = solve_level(number, algorithm, queue_type="bucket", tie_policy=tie_policy)
+                assert metrics.total_weight == weight
+
+
+def test_visited_stores_give_the_same_search():
+    for number in OPTIMAL_WEIGHTS:
+        for push_mode in (False, True):
+            results = set()
+            for visited_store in ("memory", "compact", "disk"):
+                for key_layout in ("slots", "bitset"):
+                    metrics = solve_level(number, "bfs", push_mode=push_mode, visited_store=visited_store,
+                                          key_layout=key_layout)
+                    results.add((metrics.nodes_explored, metrics.solution_path))
+            assert len(results) == 1
+
+
+def test_ida_star_is_weight_optimal():
+    for number, weight in OPTIMAL_WEIGHTS.items():
+        assert solve_level(number, "ida_star").total_weight == weight
+        # A table of a few buckets replaces entries all the time but stays optimal
+        assert solve_level(number, "ida_star", memory_mb=0.001).total_weight == weight
+
+
+def test_hda_star_is_weight_optimal():
+    for number, weight in OPTIMAL_WEIGHTS.items():
+        assert solve_level(number, "hda_star", workers=2).total_weight == weight
+
+
+# Termination detection must stop the workers once every state is exhausted
+def test_hda_star_stops_on_unsolvable_level():
+    state = GameState.from_rows([1, 1], ["#######", "#@$ $.#", "#######"])
+    solver = SolverRunner.create_solver("hda_star", state, workers=2)
+    assert SolverRunner.solve(solver, time_limit=60) == "unsolved"
+    assert not solver.processes
+
+
+def test_hda_star_reports_dead_worker():
+    solver = SolverRunner.create_solver("hda_star", GameState.from_file("input-04.txt"), workers=2)
+    solver.process_one_state()
+    solver.processes[0].kill()
+    assert SolverRunner.solve(solver, time_limit=60) == "error"
+    assert solver.error.startswith("worker 0 exited")
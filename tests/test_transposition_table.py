@@ -0,0 +1,28 @@
+from classes.TranspositionTable import TranspositionTable
+
+
+def test_visit_keeps_the_cheapest_cost():
+    table = TranspositionTable(0.001)
+    assert not table.visit(7, 5, 7)
+    assert table.visit(7, 5, 7)
+    assert table.visit(7, 6, 7)
+    # A cheaper route must be searched again
+    assert not table.visit(7, 4, 7)
+    assert table.visit(7, 4, 7)
+
+    # A new search forgets every entry
+    table.new_search()
+    assert not table.visit(7, 9, 7)
+
+
+def test_bucket_keeps_two_entries():
+    table = TranspositionTable(0.001)
+    size = table.size
+    # Three keys hashing to the same bucket; the cheapest stays in the first tier
+    assert not table.visit(1, 3, 0)
+    assert not table.visit(2, 5, size)
+    assert not table.visit(3, 4, 2 * size)
+    assert table.visit(1, 3, 0)
+    assert table.visit(3, 4, 2 * size)
+    assert not table.visit(2, 5, size)
+    assert table.replacements == 2
@@ -0,0 +1,19 @@
+import random
+from classes.VisitedStore import CompactVisitedSet, DiskVisitedSet
+
+
+def test_stores_match_a_set():
+    rng = random.Random(4)
+    key_bits = 40
+    keys = [0, (1 << key_bits) - 1] + [rng.getrandbits(key_bits) for _ in range(3000)]
+    # A tiny starting capacity makes keys share slots and the table grow several times
+    for store in (CompactVisitedSet(key_bits, capacity=4), DiskVisitedSet(key_bits, capacity=4)):
+        expected = set()
+        for key in keys:
+            assert (key in store) == (key in expected)
+            store.add(key)
+            expected.add(key)
+            assert key in store
+        assert len(store) == len(expected)
+        assert all(key in store for key in expected)
+        assert not any(key + 1 in store for key in expected if key + 1 not in expected)